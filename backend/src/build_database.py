@@ -0,0 +1,6 @@
+from config import DATA_FILE, DATABASE_FILE
+from utils.storage import build_database
+
+if __name__ == '__main__':
+    build_database(DATA_FILE, DATABASE_FILE)
+    print(f"Base de datos generada en {DATABASE_FILE}")
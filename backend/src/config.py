@@ -1,4 +1,13 @@
 import os
 
 BASE_DIR = os.path.abspath(os.path.dirname(__file__))
-DATA_FILE = os.path.join(BASE_DIR, "../data/data.csv")
+DATA_FILE = os.environ.get("DATA_FILE", os.path.join(BASE_DIR, "../data/data.csv"))
+
+# Backend de almacenamiento: "csv" (pandas en memoria) o "sqlite" (base embebida con índices)
+DATA_BACKEND = os.environ.get("DATA_BACKEND", "csv")
+DATABASE_FILE = os.environ.get("DATABASE_FILE", os.path.join(BASE_DIR, "../data/data.sqlite"))
+
+# Intervalo (segundos) con el que el stream SSE revisa si cambió el dataset
+STREAM_POLL_SECONDS = float(os.environ.get("STREAM_POLL_SECONDS", "5"))
+# Duración máxima de cada conexión SSE; al cerrarse, EventSource se reconecta solo
+STREAM_MAX_SECONDS = float(os.environ.get("STREAM_MAX_SECONDS", "300"))
@@ -0,0 +1,350 @@
+"""Prueba de carga de la API.
+
+Genera un data.csv sintético, levanta la app bajo un servidor WSGI y reproduce
+en paralelo una mezcla de peticiones a /chat, /data, /stats, /date y /allNames,
+reportando throughput y latencias p50/p95/p99.
+
+La mezcla se guarda/lee como JSONL con la misma forma que requests.jsonl
+(request_id, title, body), de modo que una corrida se puede repetir exactamente:
+
+    python load_test.py generate --coins 2000 --days 1500 --output /tmp/data.csv
+    python load_test.py run --data /tmp/data.csv --count 2000 --concurrency 32 --save-requests mix.jsonl
+    python load_test.py run --data /tmp/data.csv --requests mix.jsonl --server gunicorn --workers 4
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import time
+import urllib.error
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+BASE_DIR = os.path.abspath(os.path.dirname(__file__))
+API_PREFIX = '/api/crypto'
+REAL_COINS = ['bitcoin', 'ethereum', 'tether', 'binancecoin', 'solana', 'cardano', 'dogecoin', 'monero']
+DEFAULT_MIX = 'chat=1,data=2,stats=1,date=3,allNames=3'
+
+CHAT_QUESTIONS = [
+    '¿Cuál es el precio de {coin}?',
+    '¿Cómo está {coin} hoy?',
+    '¿Es buen momento para comprar {coin}?',
+    '¿Debería vender {coin}?',
+    '¿Qué criptomonedas recomiendas?',
+    '¿Cuáles son las monedas más estables?',
+]
+
+
+def generate_dataset(path, coins=1000, days=1460, start_date='2020-01-01', seed=42, missing=0.01):
+    """Escribe un CSV sintético con el esquema de data.csv (coin_name, date, price, total_volume, market_cap)"""
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range(start_date, periods=days).strftime('%Y-%m-%d').to_numpy()
+    names = REAL_COINS[:coins] + [f'coin-{i:05d}' for i in range(max(0, coins - len(REAL_COINS)))]
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    with open(path, 'w', newline='') as f:
+        f.write('coin_name,date,price,total_volume,market_cap\n')
+        # Se escribe por lotes de monedas para no tener todo el dataset en memoria
+        for batch_start in range(0, len(names), 100):
+            batch = names[batch_start:batch_start + 100]
+            n = len(batch)
+
+            # Movimiento browniano geométrico con volatilidad y precio inicial por moneda
+            volatility = rng.uniform(0.01, 0.08, n)
+            drift = rng.normal(0, 0.001, n)
+            initial = np.exp(rng.uniform(np.log(1e-4), np.log(5e4), n))
+            shocks = rng.normal(drift, volatility, (days, n))
+            prices = initial * np.exp(np.cumsum(shocks, axis=0))
+
+            supply = np.exp(rng.uniform(np.log(1e6), np.log(1e11), n))
+            market_caps = prices * supply
+            volumes = market_caps * np.exp(rng.normal(np.log(0.05), 0.8, (days, n)))
+
+            # Monedas que empiezan a cotizar más tarde
+            listed_from = rng.integers(0, days // 2, n) * (rng.random(n) < 0.3)
+
+            for j, name in enumerate(batch):
+                rows = slice(listed_from[j], days)
+                frame = pd.DataFrame({
+                    'coin_name': name,
+                    'date': dates[rows],
+                    'price': prices[rows, j],
+                    'total_volume': volumes[rows, j],
+                    'market_cap': market_caps[rows, j],
+                })
+                # Algunos valores faltantes, como en el dataset real
+                for column in ('price', 'total_volume', 'market_cap'):
+                    frame.loc[rng.random(len(frame)) < missing, column] = np.nan
+                frame.to_csv(f, header=False, index=False)
+
+
+def parse_mix(mix):
+    weights = {}
+    for item in mix.split(','):
+        endpoint, weight = item.split('=')
+        weights[endpoint.strip()] = float(weight)
+    return weights
+
+
+def build_requests(data_path, count, mix=DEFAULT_MIX, seed=42):
+    """Genera una mezcla de peticiones reproducible a partir de una semilla"""
+    rng = random.Random(seed)
+    data = pd.read_csv(data_path, usecols=['coin_name', 'date'])
+    coins = sorted(data['coin_name'].dropna().str.upper().unique().tolist())
+    dates = sorted(data['date'].dropna().unique().tolist())
+    years = sorted({int(date[:4]) for date in dates})
+
+    weights = parse_mix(mix)
+    endpoints = list(weights)
+
+    requests = []
+    for i in range(count):
+        endpoint = rng.choices(endpoints, weights=[weights[e] for e in endpoints])[0]
+        coin = rng.choice(coins)
+
+        if endpoint == 'chat':
+            title, body = 'POST /chat', {'question': rng.choice(CHAT_QUESTIONS).format(coin=coin.lower())}
+        elif endpoint == 'data':
+            start = rng.randrange(len(dates))
+            end = min(len(dates) - 1, start + rng.randint(30, 365))
+            title, body = 'POST /data', {'coin_name': coin, 'start_date': dates[start], 'end_date': dates[end]}
+        elif endpoint == 'stats':
+            title, body = 'POST /stats', {'year': rng.choice(years)}
+        elif endpoint == 'date':
+            title, body = 'POST /date', {'date': rng.choice(dates)}
+        elif endpoint == 'allNames':
+            title, body = 'GET /allNames', None
+        else:
+            raise ValueError(f"Unknown endpoint in mix: {endpoint}")
+
+        requests.append({'request_id': f'lt-{i:06d}', 'title': title, 'body': body})
+
+    return requests
+
+
+def load_requests(path):
+    with open(path, encoding='utf-8') as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def save_requests(requests, path):
+    with open(path, 'w', encoding='utf-8') as f:
+        for request in requests:
+            f.write(json.dumps(request, ensure_ascii=False) + '\n')
+
+
+def send_request(base_url, request, timeout):
+    method, path = request['title'].split(' ', 1)
+    data = None
+    headers = {}
+    if request.get('body') is not None:
+        data = json.dumps(request['body']).encode('utf-8')
+        headers['Content-Type'] = 'application/json'
+
+    req = urllib.request.Request(base_url + API_PREFIX + path, data=data, headers=headers, method=method)
+    start = time.perf_counter()
+    try:
+        with urllib.request.urlopen(req, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except urllib.error.HTTPError as e:
+        status = e.code
+    except (urllib.error.URLError, OSError):
+        status = None
+    return path, status, time.perf_counter() - start
+
+
+def percentile(sorted_values, q):
+    # Percentil por rango más cercano sobre valores ya ordenados
+    if not sorted_values:
+        return None
+    index = max(0, min(len(sorted_values) - 1, int(np.ceil(q / 100 * len(sorted_values))) - 1))
+    return sorted_values[index]
+
+
+def summarize(results, elapsed):
+    def stats(rows):
+        latencies = sorted(latency for _, _, latency in rows)
+        errors = sum(1 for _, status, _ in rows if status is None or status >= 500)
+        return {
+            'requests': len(rows),
+            'errors': errors,
+            'throughput': len(rows) / elapsed if elapsed else None,
+            'p50_ms': percentile(latencies, 50) * 1000 if latencies else None,
+            'p95_ms': percentile(latencies, 95) * 1000 if latencies else None,
+            'p99_ms': percentile(latencies, 99) * 1000 if latencies else None,
+        }
+
+    by_endpoint = defaultdict(list)
+    for row in results:
+        by_endpoint[row[0]].append(row)
+
+    return {
+        'elapsed_s': elapsed,
+        'total': stats(results),
+        'endpoints': {path: stats(rows) for path, rows in sorted(by_endpoint.items())},
+    }
+
+
+def replay(base_url, requests, concurrency, timeout):
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(lambda r: send_request(base_url, r, timeout), requests))
+    return summarize(results, time.perf_counter() - start)
+
+
+def print_report(report):
+    header = f"{'endpoint':<16}{'reqs':>8}{'errors':>8}{'req/s':>10}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}"
+    print(header)
+    print('-' * len(header))
+
+    def line(name, s):
+        def fmt(value):
+            return f"{value:.1f}" if value is not None else '-'
+        print(f"{name:<16}{s['requests']:>8}{s['errors']:>8}{fmt(s['throughput']):>10}"
+              f"{fmt(s['p50_ms']):>10}{fmt(s['p95_ms']):>10}{fmt(s['p99_ms']):>10}")
+
+    for path, s in report['endpoints'].items():
+        line(path, s)
+    line('total', report['total'])
+    print(f"\nDuración: {report['elapsed_s']:.2f}s")
+
+
+def start_server(args):
+    # La base SQLite va junto al CSV sintético para no pisar la de producción
+    data_file = os.path.abspath(args.data)
+    env = dict(os.environ, DATA_FILE=data_file, DATA_BACKEND=args.backend,
+               DATABASE_FILE=os.path.splitext(data_file)[0] + '.sqlite')
+    if args.server == 'gunicorn':
+        if not shutil.which('gunicorn'):
+            sys.exit("gunicorn no está instalado")
+        command = ['gunicorn', '--workers', str(args.workers), '--threads', str(args.threads),
+                   '--bind', f'{args.host}:{args.port}', '--timeout', '300', 'app:app']
+    else:
+        command = [sys.executable, os.path.abspath(__file__), 'serve', '--host', args.host,
+                   '--port', str(args.port), '--workers', str(args.workers)]
+
+    # La app carga el modelo con rutas relativas, así que se ejecuta desde src/.
+    # La salida del servidor va al log indicado para no mezclarse con el reporte
+    log = open(args.server_log, 'w') if args.server_log else subprocess.DEVNULL
+    process = subprocess.Popen(command, cwd=BASE_DIR, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+    base_url = f'http://{args.host}:{args.port}'
+    deadline = time.time() + args.startup_timeout
+    while time.time() < deadline:
+        if process.poll() is not None:
+            sys.exit("El servidor terminó antes de estar listo")
+        try:
+            with urllib.request.urlopen(base_url + API_PREFIX + '/', timeout=2):
+                return process, base_url
+        except (urllib.error.URLError, OSError):
+            time.sleep(0.5)
+
+    process.terminate()
+    sys.exit("El servidor no respondió a tiempo")
+
+
+def serve(args):
+    from werkzeug.serving import make_server
+    from app import app
+
+    # Con varios workers se usan procesos; con uno, un hilo por petición
+    if args.workers > 1:
+        server = make_server(args.host, args.port, app, processes=args.workers)
+    else:
+        server = make_server(args.host, args.port, app, threaded=True)
+    server.serve_forever()
+
+
+def run(args):
+    if not os.path.exists(args.data):
+        print(f"Generando dataset sintético en {args.data}...")
+        generate_dataset(args.data, coins=args.coins, days=args.days, seed=args.seed)
+
+    if args.requests:
+        requests = load_requests(args.requests)
+    else:
+        requests = build_requests(args.data, args.count, mix=args.mix, seed=args.seed)
+    if args.save_requests:
+        save_requests(requests, args.save_requests)
+
+    if args.url:
+        process, base_url = None, args.url.rstrip('/')
+    else:
+        process, base_url = start_server(args)
+
+    try:
+        # Peticiones de calentamiento para que las cachés no distorsionen las latencias
+        for request in requests[:args.warmup]:
+            send_request(base_url, request, args.timeout)
+        report = replay(base_url, requests, args.concurrency, args.timeout)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print_report(report)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Prueba de carga de la API de criptomonedas")
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    generate = subparsers.add_parser('generate', help="Genera un data.csv sintético")
+    generate.add_argument('--output', required=True)
+    generate.add_argument('--coins', type=int, default=1000)
+    generate.add_argument('--days', type=int, default=1460)
+    generate.add_argument('--start-date', default='2020-01-01')
+    generate.add_argument('--seed', type=int, default=42)
+
+    serve_parser = subparsers.add_parser('serve', help="Levanta la app con el servidor WSGI de werkzeug")
+    serve_parser.add_argument('--host', default='127.0.0.1')
+    serve_parser.add_argument('--port', type=int, default=5050)
+    serve_parser.add_argument('--workers', type=int, default=1)
+
+    run_parser = subparsers.add_parser('run', help="Levanta la app y reproduce la mezcla de peticiones")
+    run_parser.add_argument('--data', default=os.path.join(BASE_DIR, '../data/loadtest.csv'),
+                            help="CSV a usar (se genera si no existe)")
+    run_parser.add_argument('--coins', type=int, default=1000)
+    run_parser.add_argument('--days', type=int, default=1460)
+    run_parser.add_argument('--backend', choices=['csv', 'sqlite'], default='csv')
+    run_parser.add_argument('--requests', help="JSONL con la mezcla de peticiones a reproducir")
+    run_parser.add_argument('--save-requests', help="Guarda la mezcla generada en este JSONL")
+    run_parser.add_argument('--count', type=int, default=500)
+    run_parser.add_argument('--mix', default=DEFAULT_MIX, help="Pesos por endpoint, p. ej. 'data=2,date=1'")
+    run_parser.add_argument('--seed', type=int, default=42)
+    run_parser.add_argument('--concurrency', type=int, default=16)
+    run_parser.add_argument('--warmup', type=int, default=5)
+    run_parser.add_argument('--timeout', type=float, default=120)
+    run_parser.add_argument('--server', choices=['werkzeug', 'gunicorn'], default='werkzeug')
+    run_parser.add_argument('--workers', type=int, default=1)
+    run_parser.add_argument('--threads', type=int, default=4, help="Hilos por worker (solo gunicorn)")
+    run_parser.add_argument('--host', default='127.0.0.1')
+    run_parser.add_argument('--port', type=int, default=5050)
+    run_parser.add_argument('--url', help="Usa un servidor ya levantado en vez de iniciar uno")
+    run_parser.add_argument('--startup-timeout', type=float, default=300)
+    run_parser.add_argument('--server-log', help="Archivo donde guardar la salida del servidor")
+    run_parser.add_argument('--json', action='store_true', help="Imprime el reporte en JSON")
+
+    args = parser.parse_args()
+    if args.command == 'generate':
+        generate_dataset(args.output, coins=args.coins, days=args.days, start_date=args.start_date, seed=args.seed)
+        print(f"Dataset generado en {args.output}")
+    elif args.command == 'serve':
+        serve(args)
+    else:
+        run(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -1,5 +1,8 @@
 from flask import Blueprint, jsonify, request
-from services.crypto_service import get_summary, get_crypto_data, get_crypto_by_date, get_most_interesting_data, get_crypto_data_and_stats_for_year, get_most_volatile_and_stable, returnAllNames
+from services.crypto_service import get_summary, get_memory_report, get_crypto_data, get_crypto_by_date, get_most_interesting_data, get_crypto_data_and_stats_for_year, get_most_volatile_and_stable, get_multi_year_overview, returnAllNames
+from services.comparison_service import get_crypto_comparison
+from services.dashboard_service import get_bootstrap, stream_updates
+from services.indicator_service import get_technical_indicators
 from services.intent_classifier import IntentClassifier
 from services.response_generator import ResponseGenerator
 import os
@@ -81,4 +84,28 @@ def most_volatile_stable():
 
 @bp.route('/allNames', methods=['GET'])
 def retNames():
-    return returnAllNames()
\ No newline at end of file
+    return returnAllNames()
+
+@bp.route('/compare', methods=['POST'])
+def compare():
+    return get_crypto_comparison(request)
+
+@bp.route('/indicators', methods=['POST'])
+def indicators():
+    return get_technical_indicators(request)
+
+@bp.route('/yearly_overview', methods=['POST'])
+def yearly_overview():
+    return get_multi_year_overview(request)
+
+@bp.route('/memory_report', methods=['GET'])
+def memory_report():
+    return get_memory_report()
+
+@bp.route('/bootstrap', methods=['POST'])
+def bootstrap():
+    return get_bootstrap(request)
+
+@bp.route('/stream', methods=['GET'])
+def stream():
+    return stream_updates(request)
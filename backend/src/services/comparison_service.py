@@ -0,0 +1,111 @@
+import numpy as np
+from flask import jsonify
+from utils.price_matrix import get_price_matrix, first_valid, last_valid, daily_returns, pairwise_correlation
+
+
+def _clean(values):
+    # Convierte un arreglo de numpy a listas serializables (NaN/Inf -> None)
+    values = np.asarray(values, dtype=np.float64)
+    return np.where(np.isfinite(values), values, None).tolist()
+
+
+def _clean_value(value):
+    return float(value) if np.isfinite(value) else None
+
+
+def compare_cryptos(coins, start_date=None, end_date=None, benchmark=None, include_series=True):
+    matrix = get_price_matrix()
+
+    # Sin lista explícita se comparan todas las monedas
+    coins = [coin.upper() for coin in coins] if coins else list(matrix.coins)
+    cols, missing = matrix.columns_for(coins)
+    if missing:
+        raise KeyError(missing)
+    coins = [matrix.coins[col] for col in cols]
+
+    rows = matrix.rows_between(start_date, end_date)
+    dates = matrix.dates[rows]
+    if len(dates) == 0:
+        return None
+
+    prices = matrix.prices[rows][:, cols]
+    volumes = matrix.volumes[rows][:, cols]
+    market_caps = matrix.market_caps[rows][:, cols]
+
+    # Retornos normalizados: precio relativo al primer precio disponible del rango (base 100)
+    initial_prices = first_valid(prices)
+    final_prices = last_valid(prices)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        normalized = prices / initial_prices * 100
+        total_return = (final_prices / initial_prices - 1) * 100
+
+    returns = daily_returns(prices)
+    with np.errstate(invalid='ignore'):
+        volatility = np.nanstd(returns, axis=0, ddof=1) * 100
+        avg_volume = np.nanmean(volumes, axis=0)
+        avg_market_cap = np.nanmean(market_caps, axis=0)
+
+    correlation = pairwise_correlation(returns)
+
+    # Rendimiento relativo frente a la moneda de referencia (o frente a la media del grupo)
+    if benchmark and benchmark.upper() in coins:
+        benchmark = benchmark.upper()
+        reference = total_return[coins.index(benchmark)]
+    else:
+        benchmark = None
+        reference = np.nanmean(total_return) if np.isfinite(total_return).any() else np.nan
+
+    ranking = np.argsort(np.where(np.isfinite(total_return), -total_return, np.inf), kind='stable')
+
+    result = {
+        'start_date': str(dates[0]),
+        'end_date': str(dates[-1]),
+        'coins': coins,
+        'benchmark': benchmark,
+        'performance': [
+            {
+                'coin_name': coins[i],
+                'rank': rank + 1,
+                'initial_price': _clean_value(initial_prices[i]),
+                'final_price': _clean_value(final_prices[i]),
+                'total_return': _clean_value(total_return[i]),
+                'relative_return': _clean_value(total_return[i] - reference),
+                'volatility': _clean_value(volatility[i]),
+                'avg_volume': _clean_value(avg_volume[i]),
+                'avg_market_cap': _clean_value(avg_market_cap[i]),
+            }
+            for rank, i in enumerate(ranking)
+        ],
+        'correlation': _clean(correlation),
+    }
+
+    if include_series:
+        result['dates'] = np.datetime_as_string(dates, unit='D').tolist()
+        result['normalized'] = dict(zip(coins, _clean(normalized.T)))
+
+    return result
+
+
+def get_crypto_comparison(request):
+    # Recibe un json con coins (lista), start_date, end_date y opcionalmente benchmark
+    data = request.json or {}
+    coins = data.get('coins', [])
+    start_date = data.get('start_date')
+    end_date = data.get('end_date')
+    benchmark = data.get('benchmark')
+    include_series = data.get('include_series', True)
+
+    if not isinstance(coins, list):
+        return jsonify({"message": "coins must be a list"}), 400
+
+    try:
+        result = compare_cryptos(coins, start_date, end_date, benchmark, include_series)
+    except KeyError as e:
+        return jsonify({'message': f'Unknown coins: {", ".join(e.args[0])}'}), 404
+    except ValueError:
+        return jsonify({"message": "Invalid date format"}), 400
+
+    if result is None:
+        return jsonify({'message': 'No data found in the given date range.'}), 404
+
+    return jsonify(result), 200
@@ -1,5 +1,8 @@
 import pandas as pd
-from utils.data_loader import load_data
+from utils.data_loader import load_data, load_yearly_price_stats, load_yearly_metrics, get_coin_names, get_memory_usage, DERIVED_COLUMNS
+from utils.price_matrix import cached_price_matrix_nbytes
+from utils.compact import memory_report
+from utils.cache import data_cache
 from flask import jsonify
 from statsmodels.tsa.arima.model import ARIMA
 import numpy as np
@@ -7,35 +10,42 @@ from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
 
 def get_summary():
-    data = load_data()
+    data = load_data(columns=['coin_name', 'price'])
     summary = {
         "total_cryptos": len(data['coin_name'].unique()),
         "average_price": data['price'].mean()
     }
     return jsonify(summary), 200
 
+def get_memory_report():
+    # Huella en memoria medida del worker: RSS antes/después de cargar el dataset y actual
+    return jsonify(memory_report(get_memory_usage(), cached_price_matrix_nbytes())), 200
+
 def get_crypto_data(request):
     # Recibe como parámetro un json con el coin_name, start_date y end_date
     data = request.json
     coin_name = data.get('coin_name')
     start_date = data.get('start_date')
     end_date = data.get('end_date')
-    crypto_data = load_data()
 
     if not coin_name or not start_date or not end_date:
         return jsonify({"message": "Missing required fields"}), 400
-    
-    # Filtrar por coin_name
-    resultados = crypto_data[crypto_data['coin_name'] == coin_name]
 
-    # Filtrar por rango de fechas
-    resultados = resultados[
-        (resultados['date'] >= start_date) & (resultados['date'] <= end_date)
-    ]
+    response = compute_crypto_data(coin_name, start_date, end_date)
 
-    if resultados.empty:
+    if response is None:
         return jsonify({'message': f'No data found for {coin_name} in the given date range.'}), 404
 
+    return jsonify(response), 200
+
+@data_cache()
+def compute_crypto_data(coin_name, start_date, end_date):
+    # Filtrar por coin_name y rango de fechas (se resuelve en el backend de datos)
+    resultados = load_data(coin_name=coin_name, start_date=start_date, end_date=end_date)
+
+    if resultados.empty:
+        return None
+
     # Calcular el crecimiento o decrecimiento
     primeros_datos = resultados.sort_values(by='date').iloc[0]
     ultimos_datos = resultados.sort_values(by='date').iloc[-1]
@@ -44,16 +54,12 @@ def get_crypto_data(request):
     precio_final = ultimos_datos['price']
     variacion = ((precio_final - precio_inicial) / precio_inicial) * 100
 
-    # Calcular el ratio de volumen y market cap, manejando divisiones por cero o valores muy pequeños
-    resultados['volume_market_cap_ratio'] = resultados.apply(
-        lambda row: row['total_volume'] / row['market_cap'] if row['market_cap'] != 0 else None,
-        axis=1
-    )
-
-    # Reemplazar NaN e Infinity con None (que se convierte en null en JSON)
-    resultados['volume_market_cap_ratio'] = resultados['volume_market_cap_ratio'].replace(
-        [np.inf, -np.inf, np.nan], None
-    )
+    # El ratio volumen/market cap y los retornos ya vienen calculados desde la carga;
+    # solo se reemplazan NaN con None (que se convierte en null en JSON)
+    registros = resultados.assign(**{
+        column: resultados[column].astype(object).where(resultados[column].notna(), None)
+        for column in DERIVED_COLUMNS
+    })
 
     # Preparar datos para la predicción
     time_series = resultados.set_index('date')['price']
@@ -74,31 +80,30 @@ def get_crypto_data(request):
             'price_change_percentage': variacion,
             'predicted_prices': forecast.tolist()  # Añadir predicciones al response
         },
-        'data': resultados.to_dict(orient='records')  # Datos filtrados como lista de diccionarios
+        'data': registros.to_dict(orient='records')  # Datos filtrados como lista de diccionarios
     }
 
     print("response")
     print(response)
 
-    return jsonify(response), 200
+    return response
 
 def get_crypto_by_date(request):
     data = request.json
     print("#########################")
     print(data)
     date = data.get('date')
-    crypto_data = load_data()
 
     if not date:
         return jsonify({"message": "Missing required fields"}), 400
 
     # Filtrar por fecha
-    resultados = crypto_data[crypto_data['date'] == date]
+    resultados = load_data(columns=['coin_name', 'date', 'market_cap'], start_date=date, end_date=date)
 
     if resultados.empty:
         return jsonify({'message': f'No data found for the given date.'}), 404
 
-    resultados_grouped = resultados.groupby('coin_name').agg({
+    resultados_grouped = resultados.groupby('coin_name', observed=True).agg({
         "market_cap": "first",
     }).reset_index()
 
@@ -113,8 +118,7 @@ def get_crypto_by_date(request):
 
 
 def get_top_cryptos_by_year(crypto_data, year):
-    # Filtrar los datos por el año
-    crypto_data['date'] = pd.to_datetime(crypto_data['date'])
+    # Filtrar los datos por el año (sin modificar el DataFrame recibido)
     year_data = crypto_data[crypto_data['date'].dt.year == int(year)]
 
     # Agrupar por criptomoneda y calcular métricas
@@ -175,8 +179,8 @@ def get_most_interesting_data(request):
     if not year:
         return jsonify({"message": "Missing required field: year"}), 400
 
-    # Cargar los datos
-    crypto_data = load_data() 
+    # Cargar los datos del año
+    crypto_data = load_data(year=year)
 
     # Obtener las 4 criptomonedas más interesantes
     top_cryptos = get_top_cryptos_by_year(crypto_data, year)
@@ -203,49 +207,25 @@ def get_most_interesting_data(request):
     }), 200
 
 
-def get_crypto_with_lowest_std_dev(crypto_data, year):
-    # Filtrar los datos por el año
-    crypto_data['date'] = pd.to_datetime(crypto_data['date'])
-    year_data = crypto_data[crypto_data['date'].dt.year == int(year)]
-
-    # Calcular la desviación estándar para cada criptomoneda
-    coin_std_devs = []
-    for coin_name in year_data['coin_name'].unique():
-        coin_data = year_data[year_data['coin_name'] == coin_name]
-        std_dev = coin_data['price'].std()
-        coin_std_devs.append({'coin_name': coin_name, 'std_dev': std_dev})
+def get_crypto_with_lowest_std_dev(year):
+    # Desviación estándar de cada criptomoneda en el año (agregada en el backend de datos)
+    stats = load_yearly_price_stats(year).dropna(subset=['std_dev'])
 
     # Encontrar la criptomoneda con la menor desviación estándar
-    lowest_std_dev_coin = min(coin_std_devs, key=lambda x: x['std_dev'])
-
-    return lowest_std_dev_coin
-
-def get_cryptos_above_global_mean(crypto_data, year):
-    # Filtrar los datos por el año
+    lowest = stats.loc[stats['std_dev'].idxmin()]
 
-    print("Bitcoin")
-    print(crypto_data[crypto_data['coin_name'] == 'WRAPPED-BITCOIN'])
-    crypto_data['date'] = pd.to_datetime(crypto_data['date'])
-    year_data = crypto_data[crypto_data['date'].dt.year == int(year)]
-
-    # Calcular la media de precios para cada criptomoneda en el año
-    coin_means = []
-    for coin_name in year_data['coin_name'].unique():
-        coin_data = year_data[year_data['coin_name'] == coin_name]
-        mean_price = coin_data['price'].mean()
-        coin_means.append({'coin_name': coin_name, 'mean_price': mean_price})
-        
+    return {'coin_name': lowest['coin_name'], 'std_dev': lowest['std_dev']}
 
+def get_cryptos_above_global_mean(year):
+    # Media de precios de cada criptomoneda en el año (agregada en el backend de datos)
+    stats = load_yearly_price_stats(year)
 
     # Calcular la media global de todas las criptomonedas
-    global_mean = pd.Series([coin['mean_price'] for coin in coin_means]).mean()
+    global_mean = stats['mean_price'].mean()
 
     # Filtrar las criptomonedas cuyo precio medio está por encima de la media global
-    above_global_mean = [coin for coin in coin_means if coin['mean_price'] > global_mean]
-
-    print("Above global mean:")
-    print(above_global_mean)
-
+    above = stats[stats['mean_price'] > global_mean]
+    above_global_mean = above[['coin_name', 'mean_price']].to_dict(orient='records')
 
     # Devolver la media global y las criptomonedas por encima de la media
     return global_mean, above_global_mean
@@ -258,21 +238,28 @@ def get_crypto_data_and_stats_for_year(request):
     if not year:
         return jsonify({"message": "Missing required field: year"}), 400
 
-    # Cargar los datos
-    crypto_data = load_data()  # Asume que tienes una función para cargar los datos
+    return jsonify({"year": year, **compute_stats_for_year(int(year))}), 200
 
+@data_cache()
+def compute_stats_for_year(year):
     # Obtener la criptomoneda con la menor desviación estándar
-    lowest_std_dev_coin = get_crypto_with_lowest_std_dev(crypto_data, year)
+    lowest_std_dev_coin = get_crypto_with_lowest_std_dev(year)
 
     # Obtener las criptomonedas por encima de la media global
-    global_mean, above_global_mean = get_cryptos_above_global_mean(crypto_data, year)
+    global_mean, above_global_mean = get_cryptos_above_global_mean(year)
+
+    # Cargar solo los precios del año de esas criptomonedas
+    crypto_data = load_data(
+        columns=['coin_name', 'date', 'price'],
+        coin_name=[coin['coin_name'] for coin in above_global_mean],
+        year=year
+    )
 
     # Preparar los datos para devolver
     top_cryptos_data = []
     for coin in above_global_mean:
         coin_name = coin['coin_name']
         coin_data = crypto_data[crypto_data['coin_name'] == coin_name]
-        coin_data = coin_data[coin_data['date'].dt.year == int(year)]
         
         # Convertir la fecha a formato YYYY-MM-DD
         coin_prices = coin_data[['date', 'price']].copy()
@@ -286,35 +273,38 @@ def get_crypto_data_and_stats_for_year(request):
             'data': coin_prices
         })
 
-    # Devolver los datos en formato JSON
-    return jsonify({
-        "year": year,
+    return {
         "lowest_std_dev_coin": lowest_std_dev_coin,
         "global_mean": global_mean,
         "top_cryptos": top_cryptos_data
-    }), 200
+    }
 
 
 def get_most_volatile_and_stable(request):
-    crypto_data = load_data()
     data = request.json
     year = data.get('year')
-    # Filtrar los datos por el año
-    crypto_data['date'] = pd.to_datetime(crypto_data['date'])
-    year_data = crypto_data[crypto_data['date'].dt.year == int(year)]
 
-    # Calcular la desviación estándar para cada criptomoneda en el año
-    coin_std_devs = []
-    for coin_name in year_data['coin_name'].unique():
-        coin_data = year_data[year_data['coin_name'] == coin_name]
-        std_dev = coin_data['price'].std()
-        coin_std_devs.append({'coin_name': coin_name, 'std_dev': std_dev})
+    return jsonify({"year": year, **compute_most_volatile_and_stable(int(year))}), 200
+
+@data_cache()
+def compute_most_volatile_and_stable(year):
+    # Calcular la desviación estándar para cada criptomoneda en el año (agregada en el backend de datos)
+    stats = load_yearly_price_stats(year).dropna(subset=['std_dev'])
 
     # Encontrar la criptomoneda más volátil (con mayor desviación estándar)
-    most_volatile_coin = max(coin_std_devs, key=lambda x: x['std_dev'])
+    volatile = stats.loc[stats['std_dev'].idxmax()]
+    most_volatile_coin = {'coin_name': volatile['coin_name'], 'std_dev': volatile['std_dev']}
 
     # Encontrar la criptomoneda más estable (con menor desviación estándar)
-    most_stable_coin = min(coin_std_devs, key=lambda x: x['std_dev'])
+    stable = stats.loc[stats['std_dev'].idxmin()]
+    most_stable_coin = {'coin_name': stable['coin_name'], 'std_dev': stable['std_dev']}
+
+    # Cargar solo el historial del año de esas dos criptomonedas
+    year_data = load_data(
+        columns=['coin_name', 'date', 'price'],
+        coin_name=[most_volatile_coin['coin_name'], most_stable_coin['coin_name']],
+        year=year
+    )
 
     # Obtener el historial de precios de las criptomonedas más volátil y estable
     volatile_coin_data = year_data[year_data['coin_name'] == most_volatile_coin['coin_name']]
@@ -324,26 +314,111 @@ def get_most_volatile_and_stable(request):
     volatile_coin_data = volatile_coin_data[['date', 'price']]
     stable_coin_data = stable_coin_data[['date', 'price']]
 
-    volatile_coin_data['date'] = volatile_coin_data['date'].dt.strftime('%Y-%m-%d')
-    stable_coin_data['date'] = stable_coin_data['date'].dt.strftime('%Y-%m-%d')
+    volatile_coin_data = volatile_coin_data.assign(date=volatile_coin_data['date'].dt.strftime('%Y-%m-%d'))
+    stable_coin_data = stable_coin_data.assign(date=stable_coin_data['date'].dt.strftime('%Y-%m-%d'))
 
     # Convertir a lista de diccionarios para poder devolver
     volatile_coin_data = volatile_coin_data.to_dict(orient='records')
     stable_coin_data = stable_coin_data.to_dict(orient='records')
 
     # Devolver los resultados en un formato adecuado para el frontend
-    return jsonify({
-        "year": year,
+    return {
         "most_volatile_coin": most_volatile_coin,
         "most_stable_coin": most_stable_coin,
         "volatile_coin_data": volatile_coin_data,
         "stable_coin_data": stable_coin_data
+    }
+
+def get_yearly_metrics(years=None):
+    # Métricas por moneda y año para todos los años con una sola agregación agrupada
+    # (en SQLite se resuelve dentro del motor)
+    metrics = load_yearly_metrics(years)
+
+    metrics['price_change'] = (
+        (metrics['last_price'] - metrics['first_price']) / metrics['first_price'] * 100
+    ).replace([np.inf, -np.inf], np.nan)
+
+    return metrics
+
+
+def cluster_yearly_metrics(metrics, n_clusters=4):
+    # K-Means por año; los centroides del año anterior inicializan el siguiente,
+    # así cada ajuste converge en pocas iteraciones y los clusters conservan su significado
+    features = ['price_change', 'avg_volume', 'avg_market_cap']
+    metrics = metrics.copy()
+    metrics['cluster'] = -1
+    metrics['distance_to_centroid'] = np.nan
+
+    previous_centers = None
+    for year, index in metrics.groupby('year').groups.items():
+        year_metrics = metrics.loc[index, features].fillna(0)
+        k = min(n_clusters, len(year_metrics))
+        if k == 0:
+            continue
+
+        scaled = StandardScaler().fit_transform(year_metrics)
+        if previous_centers is not None and len(previous_centers) == k:
+            kmeans = KMeans(n_clusters=k, init=previous_centers, n_init=1)
+        else:
+            kmeans = KMeans(n_clusters=k, random_state=42)
+        clusters = kmeans.fit_predict(scaled)
+        previous_centers = kmeans.cluster_centers_
+
+        metrics.loc[index, 'cluster'] = clusters
+        metrics.loc[index, 'distance_to_centroid'] = kmeans.transform(scaled)[np.arange(len(clusters)), clusters]
+
+    return metrics
+
+
+def get_multi_year_overview(request):
+    # Recibe opcionalmente un json con la lista de años; sin años se analizan todos
+    data = request.json or {}
+    years = data.get('years')
+
+    if years is not None and not isinstance(years, list):
+        return jsonify({"message": "years must be a list"}), 400
+
+    if years is not None:
+        try:
+            years = [int(year) for year in years]
+        except (TypeError, ValueError):
+            return jsonify({"message": "years must be a list of integers"}), 400
+
+    metrics = get_yearly_metrics(years)
+
+    if metrics.empty:
+        return jsonify({'message': 'No data found for the given years.'}), 404
+
+    metrics = cluster_yearly_metrics(metrics)
+
+    columns = ['coin_name', 'price_change', 'mean_price', 'std_dev', 'avg_volume', 'avg_market_cap', 'cluster']
+    overview = {}
+    for year, year_metrics in metrics.groupby('year'):
+        std_devs = year_metrics['std_dev'].dropna()
+        # Las más interesantes son las más cercanas al centroide de cada cluster
+        top = year_metrics.loc[year_metrics.groupby('cluster')['distance_to_centroid'].idxmin()]
+        overview[int(year)] = {
+            'global_mean': year_metrics['mean_price'].mean(),
+            'most_volatile_coin': year_metrics.loc[std_devs.idxmax(), 'coin_name'] if not std_devs.empty else None,
+            'most_stable_coin': year_metrics.loc[std_devs.idxmin(), 'coin_name'] if not std_devs.empty else None,
+            'top_cryptos': top['coin_name'].tolist(),
+            'rows': year_metrics[columns].astype(object).where(year_metrics[columns].notna(), None).values.tolist()
+        }
+
+    # Respuesta compacta: las columnas se envían una sola vez y cada año lleva filas
+    return jsonify({
+        "years": sorted(overview),
+        "columns": columns,
+        "data": overview
     }), 200
 
+
 from flask import jsonify
 
+@data_cache(maxsize=1)
+def compute_coin_names():
+    return get_coin_names()
+
 def returnAllNames():
-    data = load_data()
-    names = data['coin_name'].unique().tolist()
-    names.sort()
+    names = compute_coin_names()
     return jsonify(names), 200
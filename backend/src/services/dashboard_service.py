@@ -0,0 +1,175 @@
+import json
+import time
+from datetime import timedelta
+from urllib.parse import parse_qsl, urlencode
+import pandas as pd
+from flask import Response, jsonify, stream_with_context
+from config import STREAM_POLL_SECONDS, STREAM_MAX_SECONDS
+from utils.data_loader import load_data, get_data_version
+from services.crypto_service import compute_crypto_data, compute_stats_for_year, compute_most_volatile_and_stable, compute_coin_names
+
+# Valores por defecto de la gráfica del Dashboard
+DASHBOARD_DEFAULTS = {
+    'coin_name': 'BITCOIN',
+    'start_date': '2020-01-01',
+    'end_date': '2020-12-31',
+}
+
+
+def get_bootstrap(request):
+    # Recibe un json con la página ('dashboard' o 'stats') y sus parámetros;
+    # devuelve en una sola respuesta todo lo que la página necesita
+    data = request.json or {}
+    page = data.get('page', 'dashboard')
+
+    if page == 'dashboard':
+        params = {key: data.get(key) or default for key, default in DASHBOARD_DEFAULTS.items()}
+        payload = {
+            'crypto': compute_crypto_data(params['coin_name'], params['start_date'], params['end_date']),
+            'names': compute_coin_names(),
+        }
+    elif page == 'stats':
+        year = data.get('year')
+        if not year:
+            return jsonify({"message": "Missing required field: year"}), 400
+        try:
+            year_number = int(year)
+        except (TypeError, ValueError):
+            return jsonify({"message": "year must be an integer"}), 400
+        payload = {
+            'stats': {"year": year, **compute_stats_for_year(year_number)},
+            'volatility': {"year": year, **compute_most_volatile_and_stable(year_number)},
+        }
+    else:
+        return jsonify({"message": f"Unknown page: {page}"}), 400
+
+    payload['page'] = page
+    payload['version'] = get_data_version()
+    return jsonify(payload), 200
+
+
+def _event(name, payload, event_id=None):
+    event = f"id: {event_id}\n" if event_id is not None else ""
+    return event + f"event: {name}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+def _latest_dates(coins):
+    data = load_data(columns=['coin_name', 'date'], coin_name=coins)
+    latest = data.groupby('coin_name', observed=True)['date'].max()
+    return {coin: latest.get(coin) for coin in coins}
+
+
+def _new_prices(coin_name, since, end_date=None):
+    # Registros de la moneda posteriores a la última fecha que ya tiene el cliente
+    rows = load_data(columns=['date', 'price', 'total_volume', 'market_cap'], coin_name=coin_name,
+                     start_date=since, end_date=end_date)
+    if since is not None:
+        rows = rows[rows['date'] > since]
+    return rows.sort_values('date')
+
+
+def _forecast(coin_name, last_date, start_date=None, end_date=None, days=7):
+    # Con el rango del cliente es el mismo cálculo (y la misma caché) que /data;
+    # sin rango se usa la ventana de CryptoAPIClient.get_price_trend
+    if start_date is None:
+        start_date = (last_date - timedelta(days=days)).strftime('%Y-%m-%d')
+    try:
+        result = compute_crypto_data(coin_name, start_date, end_date or last_date.strftime('%Y-%m-%d'))
+    except Exception:
+        return None
+    return result['summary'] if result else None
+
+
+def _resume_since(request, coins):
+    # Última fecha que ya tiene el cliente por moneda: en una reconexión viene en
+    # Last-Event-ID (el id de los eventos); en la primera conexión, en `since`
+    last_event_id = request.headers.get('Last-Event-ID')
+    if last_event_id:
+        since = dict(parse_qsl(last_event_id))
+    elif request.args.get('since'):
+        since = {coin: request.args['since'] for coin in coins}
+    else:
+        since = {}
+    return {coin.upper(): pd.Timestamp(date) for coin, date in since.items() if coin.upper() in coins}
+
+
+def _event_id(last_dates):
+    return urlencode({coin: date.strftime('%Y-%m-%d') for coin, date in last_dates.items() if date is not None})
+
+
+def stream_updates(request):
+    # Server-Sent Events: solo se envían los cambios (precios nuevos, pronósticos
+    # recalculados y monedas nuevas) cuando cambia el dataset. Los precios se
+    # calculan desde la última fecha que tiene el cliente, así que al conectarse
+    # con `since` (o al reconectarse) se envían enseguida los que se perdió.
+    # Con start_date/end_date solo se envían filas dentro del rango y el
+    # pronóstico es el mismo que devolvería /data para ese rango.
+    #
+    # Cada conexión ocupa un hilo mientras está abierta, así que hay que servir la
+    # app con workers que admitan muchas conexiones concurrentes (p. ej. gunicorn
+    # con --worker-class gthread y varios --threads, o gevent); con workers sync
+    # cada pestaña bloquea un worker. Para acotar ese costo la conexión se cierra
+    # tras STREAM_MAX_SECONDS y el navegador se reconecta enviando Last-Event-ID.
+    coins = [coin.upper() for coin in request.args.get('coins', '').split(',') if coin]
+    start_date = request.args.get('start_date')
+    end_date = request.args.get('end_date')
+    try:
+        since = _resume_since(request, coins)
+        for date in (start_date, end_date):
+            if date:
+                pd.Timestamp(date)
+    except ValueError:
+        return jsonify({"message": "Invalid date"}), 400
+
+    def changes(last_dates, known_names):
+        for coin in coins:
+            rows = _new_prices(coin, last_dates.get(coin), end_date)
+            if rows.empty:
+                continue
+            last_date = last_dates[coin] = rows['date'].iloc[-1]
+            rows = rows.assign(date=rows['date'].dt.strftime('%Y-%m-%d'))
+            yield _event('prices', {'coin_name': coin, 'data': rows.to_dict(orient='records')},
+                         event_id=_event_id(last_dates))
+
+            summary = _forecast(coin, last_date, start_date, end_date)
+            if summary is not None:
+                yield _event('forecast', {
+                    'coin_name': coin,
+                    'last_date': last_date.strftime('%Y-%m-%d'),
+                    'predicted_prices': summary['predicted_prices'],
+                    'summary': summary,
+                })
+
+        names = compute_coin_names()
+        added = [name for name in names if name not in known_names]
+        if added:
+            known_names.update(added)
+            yield _event('names', {'added': added})
+
+    def events():
+        current_version = get_data_version()
+        missing = [coin for coin in coins if coin not in since]
+        last_dates = {**(_latest_dates(missing) if missing else {}), **since}
+        known_names = set(compute_coin_names())
+        deadline = time.monotonic() + STREAM_MAX_SECONDS
+
+        yield f"retry: {int(STREAM_POLL_SECONDS * 2000)}\n\n"
+        if since:
+            yield from changes(last_dates, known_names)
+
+        while time.monotonic() + STREAM_POLL_SECONDS <= deadline:
+            time.sleep(STREAM_POLL_SECONDS)
+            new_version = get_data_version()
+            if new_version == current_version:
+                yield ": keep-alive\n\n"
+                continue
+            current_version = new_version
+
+            yield from changes(last_dates, known_names)
+            yield _event('version', {'version': current_version}, event_id=_event_id(last_dates))
+
+    return Response(
+        stream_with_context(events()),
+        mimetype='text/event-stream',
+        headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'}
+    )
@@ -0,0 +1,23 @@
+from flask import jsonify
+from utils.indicators import get_indicators
+
+
+def get_technical_indicators(request):
+    # Recibe un json con coin_name o una lista coins; sin monedas devuelve todas
+    data = request.json or {}
+    coins = data.get('coins') or ([data['coin_name']] if data.get('coin_name') else [])
+
+    if not isinstance(coins, list):
+        return jsonify({"message": "coins must be a list"}), 400
+
+    indicators = get_indicators()
+    coins = [coin.upper() for coin in coins] if coins else indicators.coins
+
+    missing = [coin for coin in coins if coin not in indicators.coin_index]
+    if missing:
+        return jsonify({'message': f'Unknown coins: {", ".join(missing)}'}), 404
+
+    return jsonify({
+        'last_date': str(indicators.last_date),
+        'indicators': {coin: indicators.get(coin) for coin in coins}
+    }), 200
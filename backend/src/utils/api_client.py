@@ -5,15 +5,19 @@ import numpy as np
 from statsmodels.tsa.arima.model import ARIMA
 from sklearn.cluster import KMeans
 from sklearn.preprocessing import StandardScaler
-from utils.data_loader import load_data
-from typing import Dict, List, Any, Tuple
+from utils.data_loader import load_data, get_coin_names
+from utils.price_matrix import get_price_matrix
+from utils.indicators import get_indicators
+from typing import Dict, List, Any, Optional, Tuple
 import json
 from services.crypto_service import get_crypto_data, get_top_cryptos_by_year, get_most_volatile_and_stable, returnAllNames
 
 class CryptoAPIClient:
-    def __init__(self):
-        self.data = load_data()
-    
+    # Umbrales ajustables
+    BUY_THRESHOLD = 1.0  # % mínimo de diferencia para recomendar compra
+    SELL_THRESHOLD = -2.0  # % mínimo de diferencia para recomendar venta
+    CONFIDENCE_THRESHOLD = 0.6  # Confianza mínima para recomendar
+
     def _mock_request(self, params: Dict) -> Dict:
         """Simula un objeto request para usar con tus funciones existentes"""
         class MockRequest:
@@ -23,24 +27,22 @@ class CryptoAPIClient:
     
     def get_current_price(self, crypto_name: str) -> float:
         """Obtiene el precio actual de una criptomoneda"""
-        crypto_data = self.data[self.data['coin_name'] == crypto_name.upper()]
-        if crypto_data.empty:
+        latest = get_price_matrix().latest(crypto_name)
+        if latest is None:
             raise ValueError(f"No se encontraron datos para {crypto_name}")
         
-        latest = crypto_data.sort_values('date', ascending=False).iloc[0]
         return latest['price']
     
     def get_price_trend(self, crypto_name: str, days: int = 7) -> Dict[str, Any]:
         """Obtiene la tendencia de precios usando ARIMA basado en los últimos datos disponibles"""
-        # Filtrar datos para la criptomoneda específica
-        crypto_data = self.data[self.data['coin_name'] == crypto_name.upper()]
+        # Último registro de la criptomoneda específica
+        latest = get_price_matrix().latest(crypto_name)
         
-        if crypto_data.empty:
+        if latest is None:
             raise ValueError(f"No se encontraron datos para {crypto_name}")
         
         # Obtener la última fecha disponible
-        crypto_data = crypto_data.sort_values('date', ascending=False)
-        last_date = pd.to_datetime(crypto_data.iloc[0]['date'])
+        last_date = latest['date']
         end_date = last_date.strftime('%Y-%m-%d')
         
         # Calcular la fecha de inicio (days días antes de la última fecha disponible)
@@ -88,25 +90,41 @@ class CryptoAPIClient:
         confidence = 0.7 * (1 - avg_diff) + 0.3 * (1 - cov)
         return max(0, min(1, confidence))  # Aseguramos entre 0 y 1
     
-    def get_buy_recommendation(self, crypto_name: str) -> Dict[str, Any]:
-        """Genera recomendación de compra/venta con umbrales más sensibles"""
-        analysis = self.get_price_trend(crypto_name)
+    def get_technical_signals(self, crypto_name: str) -> Dict[str, Any]:
+        """Indicadores técnicos precalculados (SMA, EMA, volatilidad, RSI, drawdown)"""
+        signals = get_indicators().get(crypto_name)
+        if signals is None:
+            raise ValueError(f"No se encontraron datos para {crypto_name}")
+        return signals
+    
+    def get_buy_recommendation(self, crypto_name: str, use_model: Optional[bool] = None) -> Dict[str, Any]:
+        """Genera recomendación de compra/venta con umbrales más sensibles.
+        
+        Por defecto se decide con los indicadores técnicos y solo se ajusta ARIMA
+        cuando estos no se pueden calcular (sin EMAs para la moneda). Con
+        use_model=True se usa siempre ARIMA y con use_model=False nunca.
+        """
+        signals = self.get_technical_signals(crypto_name)
+        if use_model is None:
+            try:
+                return self._get_signal_recommendation(signals)
+            except ValueError:
+                pass
+        elif not use_model:
+            return self._get_signal_recommendation(signals)
         
-        # Umbrales ajustables
-        BUY_THRESHOLD = 1.0  # % mínimo de diferencia para recomendar compra
-        SELL_THRESHOLD = -2.0  # % mínimo de diferencia para recomendar venta
-        CONFIDENCE_THRESHOLD = 0.6  # Confianza mínima para recomendar
+        analysis = self.get_price_trend(crypto_name)
         
         # Calcular diferencia porcentual entre predicción y precio actual
         avg_prediction = sum(analysis['predicted_prices']) / len(analysis['predicted_prices'])
         price_diff = ((avg_prediction - analysis['current_price']) / analysis['current_price']) * 100
         
         # Lógica de recomendación mejorada
-        if (analysis['confidence'] >= CONFIDENCE_THRESHOLD and 
-            price_diff > BUY_THRESHOLD):
+        if (analysis['confidence'] >= self.CONFIDENCE_THRESHOLD and 
+            price_diff > self.BUY_THRESHOLD):
             recommendation = 'buy'
-        elif (analysis['confidence'] >= CONFIDENCE_THRESHOLD and 
-            price_diff < SELL_THRESHOLD):
+        elif (analysis['confidence'] >= self.CONFIDENCE_THRESHOLD and 
+            price_diff < self.SELL_THRESHOLD):
             recommendation = 'sell'
         else:
             recommendation = 'hold'
@@ -116,7 +134,50 @@ class CryptoAPIClient:
             'confidence': analysis['confidence'],
             'price_difference': f"{price_diff:.2f}%",
             'reason': self._get_recommendation_reason(recommendation, analysis, price_diff),
-            'analysis_data': analysis
+            'analysis_data': analysis,
+            'signals': signals
+        }
+    
+    def _get_signal_recommendation(self, signals: Dict[str, Any]) -> Dict[str, Any]:
+        """Recomendación barata a partir del cruce de EMAs, el RSI y la volatilidad"""
+        if signals['ema_short'] is None or signals['ema_long'] is None:
+            raise ValueError(f"No hay suficientes datos para {signals['coin_name']}")
+        
+        # Diferencia porcentual entre la EMA corta y la larga
+        price_diff = (signals['ema_short'] / signals['ema_long'] - 1) * 100
+        
+        # Menos confianza cuanto mayor es la volatilidad diaria (10% diario o más -> 0)
+        volatility = signals['volatility'] or 0
+        confidence = max(0, min(1, 1 - volatility / 0.1))
+        
+        # El RSI evita comprar en sobrecompra y vender en sobreventa
+        if (confidence >= self.CONFIDENCE_THRESHOLD and price_diff > self.BUY_THRESHOLD
+                and signals['rsi_state'] != 'overbought'):
+            recommendation = 'buy'
+        elif (confidence >= self.CONFIDENCE_THRESHOLD and price_diff < self.SELL_THRESHOLD
+                and signals['rsi_state'] != 'oversold'):
+            recommendation = 'sell'
+        else:
+            recommendation = 'hold'
+        
+        rsi_text = f"{signals['rsi']:.1f}" if signals['rsi'] is not None else "n/d"
+        reasons = {
+            'buy': "Tendencia alcista: la media móvil corta supera a la larga",
+            'sell': "Tendencia bajista: la media móvil corta está por debajo de la larga",
+            'hold': "Tendencia neutral o sin confirmación de los indicadores"
+        }
+        reason = (
+            f"{reasons[recommendation]} ({price_diff:+.2f}%). "
+            f"El precio actual es ${signals['price']:.2f}, RSI {rsi_text}, "
+            f"volatilidad diaria {volatility*100:.2f}% (confianza {confidence*100:.1f}%)."
+        )
+        
+        return {
+            'recommendation': recommendation,
+            'confidence': confidence,
+            'price_difference': f"{price_diff:.2f}%",
+            'reason': reason,
+            'signals': signals
         }
     
     def _get_recommendation_reason(self, recommendation: str, analysis: Dict, price_diff: float) -> str:
@@ -142,13 +203,17 @@ class CryptoAPIClient:
         }
         return reasons.get(recommendation, "")
     
+    def get_latest_year(self) -> int:
+        """Último año con datos disponibles (valor por defecto de los análisis anuales)"""
+        return pd.Timestamp(get_price_matrix().dates[-1]).year
+    
     def get_top_cryptos(self, year: int = None) -> List[Dict[str, Any]]:
         """Obtiene las criptomonedas más interesantes usando KMeans"""
         if year is None:
-            year = 2024
+            year = self.get_latest_year()
         
         # Usamos tu función existente get_top_cryptos_by_year
-        crypto_data = load_data()
+        crypto_data = load_data(year=year)
         top_cryptos = get_top_cryptos_by_year(crypto_data, year)
         
         # Formateamos la respuesta
@@ -170,7 +235,7 @@ class CryptoAPIClient:
     def get_volatile_and_stable(self, year: int = None) -> Dict[str, Any]:
         """Obtiene las criptomonedas más volátiles y estables"""
         if year is None:
-            year = 2024
+            year = self.get_latest_year()
         
         # Usamos tu función existente get_most_volatile_and_stable
         response, _ = get_most_volatile_and_stable(self._mock_request({'year': year}))
@@ -192,7 +257,4 @@ class CryptoAPIClient:
     
     def get_all_crypto_names(self) -> List[str]:
     
-        data = load_data()
-        names = data['coin_name'].unique().tolist()
-        names.sort()
-        return names
\ No newline at end of file
+        return get_coin_names()
\ No newline at end of file
@@ -0,0 +1,45 @@
+import threading
+from collections import OrderedDict
+from functools import wraps
+from utils.data_loader import get_data_version
+
+
+def data_cache(maxsize=128):
+    """Memoriza el resultado de una función según sus argumentos.
+
+    Las entradas se descartan cuando cambia la versión del dataset, así que
+    varios endpoints (y páginas) comparten el mismo cálculo mientras los datos
+    no cambien. Los resultados se comparten: no deben modificarse.
+    """
+    def decorator(func):
+        lock = threading.Lock()
+        entries = OrderedDict()
+        state = {'version': None}
+
+        @wraps(func)
+        def wrapper(*args):
+            version = get_data_version()
+            with lock:
+                if state['version'] != version:
+                    entries.clear()
+                    state['version'] = version
+                if args in entries:
+                    entries.move_to_end(args)
+                    return entries[args]
+
+            result = func(*args)
+
+            with lock:
+                if state['version'] == version:
+                    entries[args] = result
+                    if len(entries) > maxsize:
+                        entries.popitem(last=False)
+            return result
+
+        def cache_clear():
+            with lock:
+                entries.clear()
+
+        wrapper.cache_clear = cache_clear
+        return wrapper
+    return decorator
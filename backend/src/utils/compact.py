@@ -0,0 +1,182 @@
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Any
+
+EPOCH = np.datetime64('1970-01-01', 'D')
+
+
+def to_day_offsets(dates: pd.Series) -> np.ndarray:
+    """Fechas como días desde 1970-01-01 en int32 (las fechas nulas quedan en 0)"""
+    days = dates.fillna(pd.Timestamp('1970-01-01')).to_numpy().astype('datetime64[D]')
+    return (days - EPOCH).astype(np.int32)
+
+
+def from_day_offsets(days) -> np.ndarray:
+    return EPOCH + np.asarray(days).astype('timedelta64[D]')
+
+
+def day_offset(date) -> int:
+    """Un string o Timestamp como días desde 1970-01-01"""
+    return int((np.datetime64(pd.Timestamp(date).date(), 'D') - EPOCH).astype(np.int64))
+
+
+class CompactMarketData:
+    """Representación compacta del dataset para mantenerla residente en cada worker.
+
+    Las monedas se guardan como códigos enteros y las fechas como días int32.
+    Precio, volumen y market cap se mantienen en float64: se devuelven tal cual
+    en /data y /date y alimentan el clustering, donde float32 cambia qué monedas
+    se eligen. Las filas están
+    ordenadas por moneda y fecha, así que cada moneda es un rango contiguo y sus
+    slices son vistas de solo lectura, sin copias. `row_id` guarda la posición
+    de cada fila en el CSV para poder devolver los resultados en el orden original.
+    """
+
+    def __init__(self, frames: Iterable[pd.DataFrame]):
+        # frames: partes del CSV en orden, con numéricos sin nulos, date como
+        # datetime y coin_name como categoría (los nombres se pasan a mayúsculas)
+        names: Dict[str, int] = {}
+        parts: Dict[str, List[np.ndarray]] = {key: [] for key in ('codes', 'day', 'price', 'total_volume', 'market_cap')}
+        for frame in frames:
+            coins = frame['coin_name'].astype('category')
+            lookup = np.array([names.setdefault(str(coin).upper(), len(names)) for coin in coins.cat.categories], dtype=np.int32)
+            codes = coins.cat.codes.to_numpy()
+            parts['codes'].append(np.where(codes >= 0, lookup[codes] if len(lookup) else codes, -1).astype(np.int32))
+            parts['day'].append(to_day_offsets(frame['date']))
+            parts['price'].append(frame['price'].to_numpy(dtype=np.float64))
+            parts['total_volume'].append(frame['total_volume'].to_numpy(dtype=np.float64))
+            parts['market_cap'].append(frame['market_cap'].to_numpy(dtype=np.float64))
+
+        def take(key, rows):
+            # Se concatena y reordena columna por columna, liberando las partes enseguida
+            values = np.concatenate(parts.pop(key)) if parts[key] else np.empty(0)
+            return values[rows]
+
+        # Códigos definitivos en orden alfabético; las filas sin moneda se descartan
+        self.coins: List[str] = sorted(names)
+        remap = np.empty(len(names), dtype=np.int32)
+        remap[[names[coin] for coin in self.coins]] = np.arange(len(self.coins), dtype=np.int32)
+        raw_codes = np.concatenate(parts.pop('codes')) if parts['codes'] else np.empty(0, dtype=np.int32)
+        row_id = np.flatnonzero(raw_codes >= 0).astype(np.int32)
+        codes = remap[raw_codes[row_id]]
+        del raw_codes
+
+        day = take('day', row_id)
+        order = np.lexsort((row_id, day, codes))
+        code_type = np.int16 if len(self.coins) < np.iinfo(np.int16).max else np.int32
+
+        self.coin_index: Dict[str, int] = {coin: i for i, coin in enumerate(self.coins)}
+        self.codes = codes[order].astype(code_type)
+        self.day = day[order]
+        del codes, day
+        rows = row_id[order]
+        self.price = take('price', rows)
+        self.total_volume = take('total_volume', rows)
+        self.market_cap = take('market_cap', rows)
+        self.row_id = rows
+        self.offsets = np.searchsorted(self.codes, np.arange(len(self.coins) + 1))
+
+        for array in self._arrays().values():
+            array.flags.writeable = False
+
+    def _arrays(self) -> Dict[str, np.ndarray]:
+        return {
+            'codes': self.codes, 'day': self.day, 'price': self.price, 'total_volume': self.total_volume,
+            'market_cap': self.market_cap, 'row_id': self.row_id, 'offsets': self.offsets,
+        }
+
+    def __len__(self):
+        return len(self.day)
+
+    @property
+    def nbytes(self) -> int:
+        return sum(a.nbytes for a in self._arrays().values())
+
+    def column_nbytes(self) -> Dict[str, int]:
+        return {name: int(array.nbytes) for name, array in self._arrays().items()}
+
+    def coin_slice(self, coin_name: str) -> Optional[Dict[str, np.ndarray]]:
+        """Vistas de solo lectura con los datos de una moneda, ordenados por fecha"""
+        i = self.coin_index.get(coin_name.upper())
+        if i is None:
+            return None
+        rows = slice(self.offsets[i], self.offsets[i + 1])
+        return {
+            'day': self.day[rows],
+            'price': self.price[rows],
+            'total_volume': self.total_volume[rows],
+            'market_cap': self.market_cap[rows],
+        }
+
+    def select(self, coins: Optional[List[str]] = None, start_day: Optional[int] = None,
+               end_day: Optional[int] = None) -> np.ndarray:
+        """Posiciones de las filas que cumplen los filtros, en el orden original del CSV"""
+        if coins is not None:
+            # Cada moneda es un rango contiguo ordenado por fecha: el filtro de fechas es búsqueda binaria
+            ranges = []
+            for coin in coins:
+                i = self.coin_index.get(coin)
+                if i is None:
+                    continue
+                start, end = self.offsets[i], self.offsets[i + 1]
+                days = self.day[start:end]
+                if start_day is not None:
+                    start += np.searchsorted(days, start_day, side='left')
+                if end_day is not None:
+                    end = self.offsets[i] + np.searchsorted(days, end_day, side='right')
+                ranges.append(np.arange(start, max(start, end)))
+            positions = np.unique(np.concatenate(ranges)) if ranges else np.empty(0, dtype=np.intp)
+        else:
+            mask = np.ones(len(self), dtype=bool)
+            if start_day is not None:
+                mask &= self.day >= start_day
+            if end_day is not None:
+                mask &= self.day <= end_day
+            positions = np.flatnonzero(mask)
+
+        return positions[np.argsort(self.row_id[positions], kind='stable')]
+
+    def previous(self, positions: np.ndarray) -> np.ndarray:
+        """Posición del registro anterior de la misma moneda (-1 en el primero de cada moneda)"""
+        first = self.offsets[self.codes[positions]]
+        return np.where(positions > first, positions - 1, -1)
+
+    def latest(self, coin_name: str) -> Optional[Dict[str, Any]]:
+        """Último registro disponible de una moneda"""
+        rows = self.coin_slice(coin_name)
+        if rows is None or len(rows['day']) == 0:
+            return None
+        return {
+            'date': pd.Timestamp(from_day_offsets(rows['day'][-1])),
+            'price': float(rows['price'][-1]),
+        }
+
+    def max_date(self) -> pd.Timestamp:
+        return pd.Timestamp(from_day_offsets(self.day.max()))
+
+
+def process_rss() -> Optional[int]:
+    # RSS actual del proceso en bytes (Linux); si no está disponible, el pico vía resource
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        pass
+    try:
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    except (ImportError, AttributeError):
+        return None
+
+
+def memory_report(storage_usage: Dict[str, Any], price_matrix_bytes: Optional[int] = None) -> Dict[str, Any]:
+    """Huella en memoria medida del worker: RSS antes y después de cargar el dataset y RSS actual"""
+    return {
+        'pid': os.getpid(),
+        'process_rss_bytes': process_rss(),
+        **storage_usage,
+        'price_matrix_bytes': price_matrix_bytes,
+    }
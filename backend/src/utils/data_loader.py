@@ -1,24 +1,37 @@
-import pandas as pd
-from config import DATA_FILE
-
-
-def load_data():
-
-    # Cargar el archivo CSV
-    data = pd.read_csv(DATA_FILE)
-    
-    # Corrección de valores nulos
-    data['price'] = data['price'].fillna(0)
-    data['total_volume'] = data['total_volume'].fillna(0)
-    data['market_cap'] = data['market_cap'].fillna(0)
-    data['date'] = data['date'].fillna('1970-01-01')  # Fecha por defecto para valores nulos
-
-    # Cambio de tipos de datos
-    data['date'] = pd.to_datetime(data['date'], errors='coerce')  # Convertir 'date' a datetime
-    data['price'] = data['price'].astype(float)
-    data['total_volume'] = data['total_volume'].astype(float)
-    data['market_cap'] = data['market_cap'].astype(float)
-    data['coin_name'] = data['coin_name'].str.upper()  # Normalizar nombres a mayúsculas
-    
-
-    return data
+from utils.storage import get_storage, BASE_COLUMNS, DERIVED_COLUMNS
+
+
+def load_data(columns=None, coin_name=None, start_date=None, end_date=None, year=None):
+    # Los filtros se delegan al backend de almacenamiento configurado
+    # (en SQLite se resuelven en el motor y solo se leen las filas necesarias)
+    return get_storage().load(
+        columns=columns,
+        coin_name=coin_name,
+        start_date=start_date,
+        end_date=end_date,
+        year=year
+    )
+
+
+def load_yearly_price_stats(year):
+    # Media, desviación estándar y número de precios por moneda para un año
+    return get_storage().yearly_price_stats(year)
+
+
+def load_yearly_metrics(years=None):
+    # Primer/último precio, media, desviación y volumen/market cap medios por año y moneda
+    return get_storage().yearly_metrics(years)
+
+
+def get_coin_names():
+    return get_storage().coin_names()
+
+
+def get_memory_usage():
+    # Memoria que ocupa el dataset residente del backend y RSS medido al cargarlo
+    return get_storage().memory_usage()
+
+
+def get_data_version():
+    # Marca de versión del dataset; las cachés en memoria se reconstruyen cuando cambia
+    return get_storage().version()
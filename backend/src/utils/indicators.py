@@ -0,0 +1,199 @@
+import copy
+import threading
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Optional
+from utils.price_matrix import PriceMatrix, get_price_matrix, last_valid
+
+
+class RollingWindow:
+    """Ventana deslizante de tamaño fijo para todas las monedas a la vez.
+
+    Mantiene la suma, la suma de cuadrados y el número de valores válidos,
+    así que cada actualización cuesta O(1) por moneda.
+    """
+
+    def __init__(self, recent: np.ndarray, window: int):
+        # recent: últimas filas (más antigua primero), como máximo `window`
+        n_coins = recent.shape[1]
+        self.buffer = np.full((window, n_coins), np.nan)
+        self.buffer[window - len(recent):] = recent[-window:]
+        self.pos = 0
+        self.sum = np.nansum(self.buffer, axis=0)
+        self.sum_sq = np.nansum(self.buffer ** 2, axis=0)
+        self.count = (~np.isnan(self.buffer)).sum(axis=0)
+
+    def push(self, values: np.ndarray):
+        old = self.buffer[self.pos]
+        old_valid, new_valid = ~np.isnan(old), ~np.isnan(values)
+        old_clean, new_clean = np.where(old_valid, old, 0.0), np.where(new_valid, values, 0.0)
+
+        self.sum += new_clean - old_clean
+        self.sum_sq += new_clean ** 2 - old_clean ** 2
+        self.count += new_valid.astype(int) - old_valid.astype(int)
+
+        self.buffer[self.pos] = values
+        self.pos = (self.pos + 1) % len(self.buffer)
+
+    def mean(self) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return np.where(self.count > 0, self.sum / self.count, np.nan)
+
+    def std(self) -> np.ndarray:
+        with np.errstate(divide='ignore', invalid='ignore'):
+            var = (self.sum_sq - self.sum ** 2 / self.count) / (self.count - 1)
+        return np.where(self.count > 1, np.sqrt(np.maximum(var, 0)), np.nan)
+
+
+class TechnicalIndicators:
+    """Indicadores técnicos (SMA, EMA, volatilidad, RSI, drawdown) para todas las monedas.
+
+    El cálculo inicial es una sola pasada vectorizada sobre la matriz de precios;
+    los días nuevos se incorporan con `update` sin recalcular el histórico.
+    Los días sin precio de una moneda no modifican sus EMA/RSI/drawdown.
+    """
+
+    def __init__(self, matrix: PriceMatrix, sma_window: int = 20, ema_short: int = 12,
+                 ema_long: int = 26, volatility_window: int = 20, rsi_period: int = 14):
+        self.coins = list(matrix.coins)
+        self.coin_index = dict(matrix.coin_index)
+        self.sma_window = sma_window
+        self.volatility_window = volatility_window
+        self.rsi_period = rsi_period
+        self.alpha_short = 2 / (ema_short + 1)
+        self.alpha_long = 2 / (ema_long + 1)
+        self.alpha_rsi = 1 / rsi_period
+        self.last_date = matrix.dates[-1] if len(matrix.dates) else None
+
+        prices = pd.DataFrame(matrix.prices)
+        # Variación respecto al último precio disponible de cada moneda
+        previous = prices.ffill().shift(1)
+        delta = prices - previous
+        returns = prices / previous - 1
+
+        def ewm_last(frame, alpha):
+            return last_valid(frame.ewm(alpha=alpha, adjust=False, ignore_na=True).mean().to_numpy())
+
+        self.last_price = last_valid(matrix.prices)
+        self.ema_short = ewm_last(prices, self.alpha_short)
+        self.ema_long = ewm_last(prices, self.alpha_long)
+        self.avg_gain = ewm_last(delta.clip(lower=0), self.alpha_rsi)
+        self.avg_loss = ewm_last((-delta).clip(lower=0), self.alpha_rsi)
+
+        running_max = prices.cummax()
+        self.peak = last_valid(running_max.to_numpy())
+        self.max_drawdown = (prices / running_max - 1).min().to_numpy()
+
+        self.price_window = RollingWindow(matrix.prices, sma_window)
+        self.return_window = RollingWindow(returns.to_numpy(), volatility_window)
+
+    def update(self, date, prices: np.ndarray):
+        """Incorpora un día nuevo (una fila de precios alineada con self.coins)"""
+        prices = np.where(prices > 0, prices, np.nan)
+        valid = ~np.isnan(prices)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            delta = prices - self.last_price
+            returns = prices / self.last_price - 1
+
+        def ewm_step(current, value, alpha):
+            step = np.where(np.isnan(current), value, alpha * value + (1 - alpha) * current)
+            return np.where(np.isnan(value), current, step)
+
+        self.ema_short = ewm_step(self.ema_short, prices, self.alpha_short)
+        self.ema_long = ewm_step(self.ema_long, prices, self.alpha_long)
+        self.avg_gain = ewm_step(self.avg_gain, np.where(np.isnan(delta), np.nan, np.maximum(delta, 0)), self.alpha_rsi)
+        self.avg_loss = ewm_step(self.avg_loss, np.where(np.isnan(delta), np.nan, np.maximum(-delta, 0)), self.alpha_rsi)
+
+        self.peak = np.fmax(self.peak, prices)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            self.max_drawdown = np.fmin(self.max_drawdown, prices / self.peak - 1)
+
+        self.price_window.push(prices)
+        self.return_window.push(returns)
+        self.last_price = np.where(valid, prices, self.last_price)
+        self.last_date = date
+
+    def extend(self, matrix: PriceMatrix) -> bool:
+        """Aplica los días de `matrix` posteriores a last_date.
+
+        Solo es válido si el dataset creció agregando días al final con las
+        mismas monedas; en otro caso devuelve False y hay que recalcular.
+        """
+        if matrix.coins != self.coins or self.last_date is None:
+            return False
+        start = np.searchsorted(matrix.dates, self.last_date, side='right')
+        if start == 0 or matrix.dates[start - 1] != self.last_date:
+            return False
+        for row in range(start, len(matrix.dates)):
+            self.update(matrix.dates[row], matrix.prices[row])
+        return True
+
+    def get(self, coin_name: str) -> Optional[Dict[str, Any]]:
+        """Últimos valores de los indicadores para una moneda"""
+        i = self.coin_index.get(coin_name.upper())
+        if i is None:
+            return None
+
+        def value(x):
+            return float(x) if np.isfinite(x) else None
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            rs = self.avg_gain[i] / self.avg_loss[i]
+            rsi = 100 - 100 / (1 + rs) if self.avg_loss[i] > 0 else (100.0 if self.avg_gain[i] > 0 else np.nan)
+            drawdown = self.last_price[i] / self.peak[i] - 1
+
+        rsi_value = value(rsi)
+        if rsi_value is None:
+            rsi_state = None
+        elif rsi_value >= 70:
+            rsi_state = 'overbought'
+        elif rsi_value <= 30:
+            rsi_state = 'oversold'
+        else:
+            rsi_state = 'neutral'
+
+        ema_short, ema_long = value(self.ema_short[i]), value(self.ema_long[i])
+        trend = None if ema_short is None or ema_long is None else ('up' if ema_short > ema_long else 'down')
+
+        return {
+            'coin_name': self.coins[i],
+            'last_date': str(self.last_date),
+            'price': value(self.last_price[i]),
+            'sma': value(self.price_window.mean()[i]),
+            'ema_short': ema_short,
+            'ema_long': ema_long,
+            'volatility': value(self.return_window.std()[i]),
+            'rsi': rsi_value,
+            'drawdown': value(drawdown),
+            'max_drawdown': value(self.max_drawdown[i]),
+            'trend': trend,
+            'rsi_state': rsi_state,
+            'windows': {
+                'sma': self.sma_window,
+                'volatility': self.volatility_window,
+                'rsi': self.rsi_period,
+            },
+        }
+
+
+_indicators_lock = threading.Lock()
+_indicators_cache = {'matrix': None, 'indicators': None}
+
+
+def get_indicators() -> TechnicalIndicators:
+    """Indicadores compartidos; se actualizan de forma incremental cuando llegan días nuevos.
+
+    La instancia devuelta no se modifica nunca: los días nuevos se aplican sobre
+    una copia que luego reemplaza a la cacheada, así que las peticiones en curso
+    siguen leyendo un estado consistente.
+    """
+    matrix = get_price_matrix()
+    with _indicators_lock:
+        indicators = _indicators_cache['indicators']
+        if _indicators_cache['matrix'] is not matrix:
+            updated = copy.deepcopy(indicators) if indicators is not None else None
+            indicators = updated if updated is not None and updated.extend(matrix) else TechnicalIndicators(matrix)
+            _indicators_cache['matrix'] = matrix
+            _indicators_cache['indicators'] = indicators
+        return indicators
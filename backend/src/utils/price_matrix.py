@@ -0,0 +1,132 @@
+import threading
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, List, Optional, Tuple
+from utils.data_loader import load_data, get_data_version, BASE_COLUMNS
+
+
+class PriceMatrix:
+    """Matriz alineada fecha x moneda con precios, volúmenes y market caps.
+
+    Las filas son fechas ordenadas y las columnas las monedas; los huecos
+    (días sin dato para una moneda) quedan como NaN.
+    """
+
+    def __init__(self, data: pd.DataFrame):
+        data = data.drop_duplicates(subset=['date', 'coin_name'], keep='last')
+        pivot = data.pivot(index='date', columns='coin_name',
+                           values=['price', 'total_volume', 'market_cap']).sort_index()
+
+        self.dates = pivot.index.values.astype('datetime64[D]')
+        self.coins: List[str] = [str(coin) for coin in pivot['price'].columns]
+        self.coin_index: Dict[str, int] = {coin: i for i, coin in enumerate(self.coins)}
+
+        prices = pivot['price'].to_numpy(dtype=np.float64)
+        # load_data rellena los precios nulos con 0: aquí se tratan como faltantes
+        self.prices = np.where(prices > 0, prices, np.nan)
+        self.volumes = pivot['total_volume'].to_numpy(dtype=np.float32)
+        self.market_caps = pivot['market_cap'].to_numpy(dtype=np.float32)
+
+    @property
+    def nbytes(self) -> int:
+        return self.dates.nbytes + self.prices.nbytes + self.volumes.nbytes + self.market_caps.nbytes
+
+    def latest(self, coin_name: str) -> Optional[Dict[str, Any]]:
+        """Último precio válido de una moneda y su fecha"""
+        i = self.coin_index.get(coin_name.upper())
+        if i is None:
+            return None
+        valid = np.flatnonzero(~np.isnan(self.prices[:, i]))
+        if len(valid) == 0:
+            return None
+        return {'date': pd.Timestamp(self.dates[valid[-1]]), 'price': float(self.prices[valid[-1], i])}
+
+    def columns_for(self, coins: List[str]) -> Tuple[np.ndarray, List[str]]:
+        """Devuelve los índices de columna de las monedas y las que no existen"""
+        missing = [coin for coin in coins if coin not in self.coin_index]
+        cols = np.array([self.coin_index[coin] for coin in coins if coin in self.coin_index], dtype=np.intp)
+        return cols, missing
+
+    def rows_between(self, start_date: Optional[str], end_date: Optional[str]) -> slice:
+        """Rango de filas (inclusive) entre dos fechas usando búsqueda binaria"""
+        start = 0 if not start_date else np.searchsorted(self.dates, np.datetime64(start_date, 'D'), side='left')
+        end = len(self.dates) if not end_date else np.searchsorted(self.dates, np.datetime64(end_date, 'D'), side='right')
+        return slice(int(start), int(end))
+
+
+_matrix_lock = threading.Lock()
+_matrix_cache = {'version': None, 'matrix': None}
+
+
+def get_price_matrix() -> PriceMatrix:
+    """Matriz compartida en memoria; se reconstruye solo si cambió el dataset"""
+    version = get_data_version()
+    with _matrix_lock:
+        if _matrix_cache['matrix'] is None or _matrix_cache['version'] != version:
+            _matrix_cache['matrix'] = PriceMatrix(load_data(columns=BASE_COLUMNS))
+            _matrix_cache['version'] = version
+        return _matrix_cache['matrix']
+
+
+def cached_price_matrix_nbytes() -> Optional[int]:
+    """Memoria de la matriz ya construida en este worker (None si aún no se construyó)"""
+    matrix = _matrix_cache['matrix']
+    return matrix.nbytes if matrix is not None else None
+
+
+def first_valid(values: np.ndarray) -> np.ndarray:
+    """Primer valor no nulo de cada columna (NaN si la columna está vacía)"""
+    valid = ~np.isnan(values)
+    idx = valid.argmax(axis=0)
+    firsts = values[idx, np.arange(values.shape[1])]
+    return np.where(valid.any(axis=0), firsts, np.nan)
+
+
+def last_valid(values: np.ndarray) -> np.ndarray:
+    """Último valor no nulo de cada columna (NaN si la columna está vacía)"""
+    return first_valid(values[::-1])
+
+
+def daily_returns(prices: np.ndarray) -> np.ndarray:
+    """Retornos diarios simples; NaN donde falta alguno de los dos precios"""
+    returns = np.full(prices.shape, np.nan)
+    returns[1:] = prices[1:] / prices[:-1] - 1
+    return returns
+
+
+def pairwise_correlation(returns: np.ndarray) -> np.ndarray:
+    """Correlación de Pearson por pares usando solo las fechas comunes a cada par.
+
+    Se calcula con productos matriciales sobre las máscaras de datos válidos,
+    sin iterar sobre los pares de monedas. Las columnas se centran antes en su
+    media para no restar sumas grandes casi iguales; las monedas sin varianza
+    (p. ej. stablecoins con retorno constante) quedan con correlación NaN.
+    """
+    mask = (~np.isnan(returns)).astype(np.float64)
+    with np.errstate(invalid='ignore'):
+        means = np.nanmean(np.where(mask.any(axis=0), returns, 0.0), axis=0)
+    x = np.where(mask > 0, returns - means, 0.0)
+
+    n = mask.T @ mask
+    sum_x = x.T @ mask
+    sum_y = sum_x.T
+    sum_xx = (x * x).T @ mask
+    sum_yy = sum_xx.T
+    sum_xy = x.T @ x
+
+    # Magnitud sin centrar de cada par, para decidir cuándo una varianza es cero numéricamente
+    raw = np.where(mask > 0, returns, 0.0)
+    raw_xx = (raw * raw).T @ mask
+    tolerance = np.finfo(np.float64).eps * np.maximum(raw_xx, np.finfo(np.float64).tiny) * 16
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        cov = sum_xy - sum_x * sum_y / n
+        var_x = sum_xx - sum_x ** 2 / n
+        var_y = sum_yy - sum_y ** 2 / n
+        corr = cov / np.sqrt(var_x * var_y)
+
+    corr[(n < 2) | (var_x <= tolerance) | (var_y <= tolerance.T)] = np.nan
+    # Cada moneda consigo misma es exactamente 1 (salvo las que quedaron en NaN)
+    diagonal = np.diagonal(corr)
+    np.fill_diagonal(corr, np.where(np.isnan(diagonal), np.nan, 1.0))
+    return np.clip(corr, -1.0, 1.0)
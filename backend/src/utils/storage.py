@@ -0,0 +1,419 @@
+import os
+import sqlite3
+import threading
+from contextlib import closing
+import numpy as np
+import pandas as pd
+from config import DATA_BACKEND, DATA_FILE, DATABASE_FILE
+from utils.compact import CompactMarketData, day_offset, from_day_offsets, process_rss
+
+BASE_COLUMNS = ['coin_name', 'date', 'price', 'total_volume', 'market_cap']
+DERIVED_COLUMNS = ['volume_market_cap_ratio', 'daily_return', 'log_return']
+COLUMNS = BASE_COLUMNS + DERIVED_COLUMNS
+
+
+def clean_data(data):
+    # Corrección de valores nulos y tipos (solo sobre las columnas presentes)
+    for column in ('price', 'total_volume', 'market_cap'):
+        if column in data:
+            data[column] = data[column].fillna(0).astype(float)
+
+    if 'date' in data:
+        data['date'] = data['date'].fillna('1970-01-01')  # Fecha por defecto para valores nulos
+        data['date'] = pd.to_datetime(data['date'], errors='coerce')  # Convertir 'date' a datetime
+
+    if 'coin_name' in data:
+        data['coin_name'] = data['coin_name'].str.upper()  # Normalizar nombres a mayúsculas
+        data['coin_name'] = data['coin_name'].astype('category')  # Un código entero por fila en vez de un str
+
+    return data
+
+
+def add_derived_metrics(data, prices, previous):
+    # Métricas derivadas vectorizadas sobre las filas seleccionadas. `prices` son
+    # los precios del dataset completo y `previous` la posición en él del registro
+    # anterior de cada fila (-1 si no hay), para que el retorno del primer día del
+    # rango use el día anterior.
+    # Las divisiones por cero o con precios nulos (rellenados con 0) quedan como NaN
+    market_cap = data['market_cap'].where(data['market_cap'] != 0)
+    ratio = data['total_volume'] / market_cap
+
+    price = data['price'].to_numpy()
+    previous_price = np.where(previous >= 0, prices[previous], np.nan)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        growth = np.where((price > 0) & (previous_price > 0), price / previous_price, np.nan)
+
+    return {
+        'volume_market_cap_ratio': ratio,
+        'daily_return': pd.Series(growth - 1, index=data.index),
+        'log_return': pd.Series(np.log(growth), index=data.index),
+    }
+
+
+def _as_list(value):
+    if value is None:
+        return None
+    return list(value) if isinstance(value, (list, tuple, set)) else [value]
+
+
+def _mtime(path):
+    try:
+        return os.path.getmtime(path)
+    except OSError:
+        return None
+
+
+def _year_range(year):
+    return f"{int(year)}-01-01", f"{int(year) + 1}-01-01"
+
+
+class CSVStorage:
+    """Backend original: lee el CSV con pandas y filtra en memoria.
+
+    El dataset se conserva en memoria en el layout compacto (CompactMarketData)
+    y solo se vuelve a leer cuando cambia el archivo. Cada consulta arma un
+    DataFrame nuevo con las filas y columnas pedidas, en el orden del CSV; las
+    métricas derivadas se calculan sobre esas filas.
+    """
+
+    def __init__(self, path, chunksize=200_000):
+        self.path = path
+        self.chunksize = chunksize
+        self._lock = threading.Lock()
+        self._version = None
+        self._data = None
+        self._rss = {}
+
+    def version(self):
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def _chunks(self):
+        # coin_name y date se leen como categorías para no crear un objeto str por
+        # fila (la memoria de esos objetos queda fragmentada y no vuelve al sistema);
+        # las mayúsculas de los nombres las normaliza CompactMarketData
+        for chunk in pd.read_csv(self.path, usecols=BASE_COLUMNS, chunksize=self.chunksize,
+                                 dtype={'coin_name': 'category', 'date': 'category'}):
+            for column in ('price', 'total_volume', 'market_cap'):
+                chunk[column] = chunk[column].fillna(0).astype(float)
+            chunk['date'] = pd.to_datetime(chunk['date'], errors='coerce')
+            yield chunk
+
+    def _compact(self):
+        version = self.version()
+        with self._lock:
+            if self._data is None or self._version != version:
+                self._data = None
+                rss_before = process_rss()
+                self._data = CompactMarketData(self._chunks())
+                self._version = version
+                self._rss = {'rss_before_load_bytes': rss_before, 'rss_after_load_bytes': process_rss()}
+            return self._data
+
+    def load(self, columns=None, coin_name=None, start_date=None, end_date=None, year=None):
+        columns = [c for c in COLUMNS if c in (columns or COLUMNS)]
+        data = self._compact()
+
+        start_day = day_offset(start_date) if start_date else None
+        end_day = day_offset(end_date) if end_date else None
+        if year is not None:
+            year_start, year_end = day_offset(f"{int(year)}-01-01"), day_offset(f"{int(year)}-12-31")
+            start_day = year_start if start_day is None else max(start_day, year_start)
+            end_day = year_end if end_day is None else min(end_day, year_end)
+
+        positions = data.select(_as_list(coin_name), start_day, end_day)
+        index = pd.Index(data.row_id[positions].astype(np.int64))
+
+        # Siempre se devuelve un DataFrame nuevo: las vistas del layout compacto son de solo lectura
+        result = pd.DataFrame({
+            'coin_name': pd.Categorical.from_codes(data.codes[positions], categories=data.coins),
+            'date': from_day_offsets(data.day[positions]).astype('datetime64[us]'),
+            'price': data.price[positions],
+            'total_volume': data.total_volume[positions],
+            'market_cap': data.market_cap[positions],
+        }, index=index)
+
+        derived = [c for c in columns if c in DERIVED_COLUMNS]
+        if derived:
+            metrics = add_derived_metrics(result, data.price, data.previous(positions))
+            result = result.assign(**{column: metrics[column] for column in derived})
+
+        result = result[columns]
+        if 'coin_name' in result:
+            result = result.assign(coin_name=result['coin_name'].cat.remove_unused_categories())
+        return result
+
+    def memory_usage(self):
+        data = self._compact()
+        return {
+            'backend': 'csv',
+            'rows': len(data),
+            'coins': len(data.coins),
+            'resident_bytes': data.nbytes,
+            'columns': data.column_nbytes(),
+            **self._rss,
+        }
+
+    def coin_names(self):
+        return list(self._compact().coins)
+
+    def yearly_price_stats(self, year):
+        data = self.load(columns=['coin_name', 'price'], year=year)
+        return data.groupby('coin_name', observed=True)['price'].agg(
+            mean_price='mean', std_dev='std', count='size'
+        ).reset_index()
+
+    def yearly_metrics(self, years=None):
+        data = self.load(columns=['coin_name', 'date', 'price', 'total_volume', 'market_cap'])
+        data = data.sort_values('date')
+        year = data['date'].dt.year.rename('year')
+        if years:
+            mask = year.isin([int(y) for y in years])
+            data, year = data[mask], year[mask]
+
+        metrics = data.groupby([year, data['coin_name']], sort=True, observed=True).agg(
+            first_price=('price', 'first'),
+            last_price=('price', 'last'),
+            mean_price=('price', 'mean'),
+            std_dev=('price', 'std'),
+            avg_volume=('total_volume', 'mean'),
+            avg_market_cap=('market_cap', 'mean'),
+        ).reset_index()
+        metrics['coin_name'] = metrics['coin_name'].astype(str)
+        return metrics
+
+
+class SQLiteStorage:
+    """Backend embebido en SQLite con índice (coin_name, date).
+
+    Los filtros por moneda, fecha y año y las agregaciones por moneda se
+    resuelven en el motor, así que solo se leen las filas y columnas necesarias.
+    La base se genera a partir del CSV y guarda en la tabla `metadata` la ruta,
+    fecha de modificación y tamaño del CSV de origen; se regenera cuando no
+    coinciden con el CSV configurado.
+    """
+
+    def __init__(self, path, source=None):
+        self.path = path
+        self.source = source
+        self._lock = threading.Lock()
+        self._checked_source = None
+
+    def _connect(self):
+        self._sync()
+        return closing(sqlite3.connect(f"file:{self.path}?mode=ro", uri=True))
+
+    def _sync(self):
+        if not self.source or not os.path.exists(self.source):
+            return
+        source = source_signature(self.source)
+        with self._lock:
+            # La metadata solo se vuelve a leer si cambió el CSV o la propia base
+            if self._checked_source == (source, _mtime(self.path)):
+                return
+            if self._stored_source() != source:
+                build_database(self.source, self.path)
+            self._checked_source = (source, _mtime(self.path))
+
+    def _stored_source(self):
+        # Origen con el que se generó la base; None si no existe, es de una
+        # versión anterior (sin metadata o sin las columnas derivadas) o está dañada
+        if not os.path.exists(self.path):
+            return None
+        try:
+            with closing(sqlite3.connect(f"file:{self.path}?mode=ro", uri=True)) as conn:
+                existing = {row[1] for row in conn.execute("PRAGMA table_info(market_data)")}
+                if not set(COLUMNS) <= existing:
+                    return None
+                row = conn.execute("SELECT source, source_mtime, source_size FROM metadata").fetchone()
+        except sqlite3.DatabaseError:
+            return None
+        return tuple(row) if row else None
+
+    def version(self):
+        self._sync()
+        try:
+            return os.path.getmtime(self.path)
+        except OSError:
+            return None
+
+    def load(self, columns=None, coin_name=None, start_date=None, end_date=None, year=None):
+        columns = [c for c in COLUMNS if c in (columns or COLUMNS)]
+        where, params = [], []
+
+        coins = _as_list(coin_name)
+        if coins is not None:
+            where.append(f"coin_name IN ({', '.join('?' * len(coins))})")
+            params.extend(coins)
+        if start_date:
+            where.append("date >= ?")
+            params.append(str(start_date))
+        if end_date:
+            where.append("date <= ?")
+            params.append(str(end_date))
+        if year is not None:
+            where.append("date >= ? AND date < ?")
+            params.extend(_year_range(year))
+
+        query = f"SELECT {', '.join(columns)} FROM market_data"
+        if where:
+            query += " WHERE " + " AND ".join(where)
+
+        with self._connect() as conn:
+            data = pd.read_sql_query(query, conn, params=params)
+
+        # Los NULL de las métricas derivadas llegan como None si la columna no tiene otros valores
+        for column in DERIVED_COLUMNS:
+            if column in data:
+                data[column] = data[column].astype(float)
+        return clean_data(data)
+
+    def memory_usage(self):
+        # Los datos quedan en la base: el worker no conserva el dataset en memoria
+        return {'backend': 'sqlite', 'resident_bytes': 0}
+
+    def coin_names(self):
+        with self._connect() as conn:
+            rows = conn.execute("SELECT DISTINCT coin_name FROM market_data ORDER BY coin_name").fetchall()
+        return [row[0] for row in rows]
+
+    def yearly_price_stats(self, year):
+        # SQLite no tiene STDEV: se calcula en dos pasadas (media y desviaciones) dentro del motor
+        query = """
+            WITH means AS (
+                SELECT coin_name, AVG(price) AS mean_price, COUNT(price) AS count
+                FROM market_data
+                WHERE date >= ? AND date < ?
+                GROUP BY coin_name
+            )
+            SELECT d.coin_name, m.mean_price, m.count,
+                   SUM((d.price - m.mean_price) * (d.price - m.mean_price)) AS squared_deviation
+            FROM market_data d JOIN means m ON d.coin_name = m.coin_name
+            WHERE d.date >= ? AND d.date < ?
+            GROUP BY d.coin_name
+        """
+        with self._connect() as conn:
+            stats = pd.read_sql_query(query, conn, params=_year_range(year) * 2)
+
+        stats['std_dev'] = (stats['squared_deviation'] / (stats['count'] - 1)) ** 0.5
+        stats.loc[stats['count'] < 2, 'std_dev'] = float('nan')
+        return stats[['coin_name', 'mean_price', 'std_dev', 'count']]
+
+    def yearly_metrics(self, years=None):
+        # Métricas por año y moneda agrupadas en el motor: primer/último precio del
+        # año, media y desviación del precio (en dos pasadas) y volumen/market cap medios
+        where, params = "", []
+        if years:
+            where = "WHERE " + " OR ".join("(date >= ? AND date < ?)" for _ in years)
+            for year in years:
+                params.extend(_year_range(year))
+
+        query = f"""
+            WITH filtered AS (
+                SELECT CAST(substr(date, 1, 4) AS INTEGER) AS year, coin_name, date,
+                       price, total_volume, market_cap
+                FROM market_data
+                {where}
+            ),
+            totals AS (
+                SELECT year, coin_name, MIN(date) AS first_date, MAX(date) AS last_date,
+                       AVG(price) AS mean_price, COUNT(price) AS count,
+                       AVG(total_volume) AS avg_volume, AVG(market_cap) AS avg_market_cap
+                FROM filtered
+                GROUP BY year, coin_name
+            )
+            SELECT t.year, t.coin_name,
+                   MAX(CASE WHEN f.date = t.first_date THEN f.price END) AS first_price,
+                   MAX(CASE WHEN f.date = t.last_date THEN f.price END) AS last_price,
+                   t.mean_price, t.count,
+                   SUM((f.price - t.mean_price) * (f.price - t.mean_price)) AS squared_deviation,
+                   t.avg_volume, t.avg_market_cap
+            FROM filtered f JOIN totals t ON f.year = t.year AND f.coin_name = t.coin_name
+            GROUP BY t.year, t.coin_name
+            ORDER BY t.year, t.coin_name
+        """
+        with self._connect() as conn:
+            metrics = pd.read_sql_query(query, conn, params=params)
+
+        metrics['std_dev'] = (metrics['squared_deviation'] / (metrics['count'] - 1)) ** 0.5
+        metrics.loc[metrics['count'] < 2, 'std_dev'] = float('nan')
+        return metrics[['year', 'coin_name', 'first_price', 'last_price', 'mean_price', 'std_dev',
+                        'avg_volume', 'avg_market_cap']]
+
+
+def _safe_ln(value):
+    return float(np.log(value)) if value is not None and value > 0 else None
+
+
+def source_signature(csv_path):
+    """Identifica el CSV de origen por ruta absoluta, fecha de modificación y tamaño"""
+    return os.path.abspath(csv_path), os.path.getmtime(csv_path), os.path.getsize(csv_path)
+
+
+def build_database(csv_path, db_path, chunksize=500_000):
+    # Se toma la firma antes de leer: si el CSV cambia durante la carga, la
+    # siguiente comprobación no coincidirá y la base se volverá a generar
+    source = source_signature(csv_path)
+
+    # Se escribe en un archivo temporal y se reemplaza al final para que
+    # otros procesos nunca lean una base a medio construir
+    os.makedirs(os.path.dirname(os.path.abspath(db_path)), exist_ok=True)
+    tmp_path = f"{db_path}.{os.getpid()}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+
+    with closing(sqlite3.connect(tmp_path)) as conn:
+        conn.create_function('safe_ln', 1, _safe_ln, deterministic=True)
+        conn.execute("""
+            CREATE TEMP TABLE raw_data (
+                coin_name TEXT NOT NULL,
+                date TEXT NOT NULL,
+                price REAL,
+                total_volume REAL,
+                market_cap REAL
+            )
+        """)
+        for chunk in pd.read_csv(csv_path, usecols=BASE_COLUMNS, chunksize=chunksize):
+            chunk = clean_data(chunk)
+            chunk['date'] = chunk['date'].dt.strftime('%Y-%m-%d').fillna('1970-01-01')
+            chunk['coin_name'] = chunk['coin_name'].astype(str)
+            chunk[BASE_COLUMNS].to_sql('raw_data', conn, if_exists='append', index=False)
+
+        # Las métricas derivadas se materializan una vez con funciones de ventana
+        conn.execute("""
+            CREATE TABLE market_data AS
+            SELECT coin_name, date, price, total_volume, market_cap,
+                   CASE WHEN market_cap != 0 THEN total_volume / market_cap END AS volume_market_cap_ratio,
+                   CASE WHEN price > 0 AND previous_price > 0 THEN price / previous_price - 1 END AS daily_return,
+                   CASE WHEN price > 0 AND previous_price > 0 THEN safe_ln(price / previous_price) END AS log_return
+            FROM (
+                SELECT *, LAG(price) OVER (PARTITION BY coin_name ORDER BY date) AS previous_price
+                FROM raw_data
+            )
+        """)
+        conn.execute("CREATE INDEX idx_market_data_coin_date ON market_data (coin_name, date)")
+        conn.execute("CREATE INDEX idx_market_data_date ON market_data (date)")
+        conn.execute("CREATE TABLE metadata (source TEXT NOT NULL, source_mtime REAL NOT NULL, source_size INTEGER NOT NULL)")
+        conn.execute("INSERT INTO metadata VALUES (?, ?, ?)", source)
+        conn.commit()
+
+    os.replace(tmp_path, db_path)
+
+
+_storage = None
+_storage_lock = threading.Lock()
+
+
+def get_storage():
+    global _storage
+    with _storage_lock:
+        if _storage is None:
+            if DATA_BACKEND == 'sqlite':
+                _storage = SQLiteStorage(DATABASE_FILE, source=DATA_FILE)
+            elif DATA_BACKEND == 'csv':
+                _storage = CSVStorage(DATA_FILE)
+            else:
+                raise ValueError(f"Unknown data backend: {DATA_BACKEND}")
+        return _storage
@@ -1,5 +1,5 @@
-import React, { useState, useEffect } from "react";
-import { fetchAllNames, fetchDetailedCryptoData } from "../services/api";
+import React, { useState, useEffect, useRef } from "react";
+import { fetchAllNames, fetchDetailedCryptoData, subscribeToUpdates } from "../services/api";
 import { Line } from "react-chartjs-2";
 import { Chart as ChartJS, CategoryScale, LinearScale, PointElement, LineElement, Title, Tooltip, Legend, Filler } from "chart.js";
 import { FaSpinner } from "react-icons/fa";
@@ -21,6 +21,10 @@ const CryptoDetail = () => {
   const [loading, setLoading] = useState(false); // Estado de carga
   const [error, setError] = useState(null); // Estado de error
   const [dateError, setDateError] = useState(""); // Error de fechas
+  const unsubscribeRef = useRef(null); // Cierra la suscripción a /stream del rango actual
+
+  // Cerrar la suscripción al salir de la página
+  useEffect(() => () => unsubscribeRef.current?.(), []);
 
   // Cargar las criptomonedas disponibles
   useEffect(() => {
@@ -64,8 +68,30 @@ const CryptoDetail = () => {
     setLoading(true);
     setError(null);
     try {
+      unsubscribeRef.current?.();
+      unsubscribeRef.current = null;
+
       const response = await fetchDetailedCryptoData(selectedCoin, startDate, endDate);
       setData(response.data);
+
+      // Si el rango llega más allá del último dato disponible, los días nuevos entrarán
+      // en él: el servidor envía solo esos días y el pronóstico recalculado para el rango
+      const rows = response.data?.data || [];
+      const lastDate = rows.length > 0 ? new Date(rows[rows.length - 1].date).toISOString().slice(0, 10) : null;
+      if (lastDate && lastDate < endDate) {
+        unsubscribeRef.current = subscribeToUpdates(
+          [selectedCoin],
+          { since: lastDate, startDate, endDate },
+          {
+            onPrices: ({ data: newRows }) => {
+              setData((current) => current && { ...current, data: [...current.data, ...newRows] });
+            },
+            onForecast: ({ summary }) => {
+              setData((current) => current && { ...current, summary: { ...current.summary, ...summary } });
+            },
+          }
+        );
+      }
     } catch (err) {
       if (err.response && err.response.status === 404) {
         setError("No se encontraron datos para las fechas seleccionadas.");
@@ -11,7 +11,7 @@ import {
   LinearScale,
   Filler,
 } from "chart.js";
-import { fetchDetailedCryptoData, fetchAllNames } from "../services/api";
+import { fetchBootstrap } from "../services/api";
 import { FiTrendingUp, FiTrendingDown, FiDatabase } from "react-icons/fi";
 import {
   FaBitcoin,
@@ -59,17 +59,18 @@ const Dashboard = () => {
       try {
         setLoading(true); // Activamos el estado de carga
 
-        const bitcoinResponse = await fetchDetailedCryptoData(
-          "BITCOIN",
-          "2020-01-01",
-          "2020-12-31"
-        );
-
-        setBitcoinData(bitcoinResponse.data.data);
-        setSummary(bitcoinResponse.data.summary);
-
-        const cryptosResponse = await fetchAllNames();
-        setAllCryptos(cryptosResponse.data);
+        // Una sola petición con los datos de Bitcoin y la lista de criptomonedas.
+        // El rango es cerrado, así que no hace falta suscribirse a /stream: los
+        // datos nuevos siempre son posteriores a end_date
+        const { data } = await fetchBootstrap("dashboard", {
+          coin_name: "BITCOIN",
+          start_date: "2020-01-01",
+          end_date: "2020-12-31",
+        });
+
+        setBitcoinData(data.crypto?.data || []);
+        setSummary(data.crypto?.summary || {});
+        setAllCryptos(data.names || []);
 
         setLoading(false); // Desactivamos el estado de carga
       } catch (error) {
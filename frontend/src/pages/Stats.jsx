@@ -1,5 +1,5 @@
 import React, { useState, useEffect } from "react";
-import { fetchStats, fetchVolatilityStats } from "../services/api";
+import { fetchBootstrap } from "../services/api";
 import { BsCalendarDate } from "react-icons/bs";
 import { Line } from "react-chartjs-2";
 import { Chart as ChartJS, CategoryScale, LinearScale, PointElement, LineElement, Title, Tooltip, Legend } from "chart.js";
@@ -22,17 +22,15 @@ const Stats = () => {
       setLoading(true);
       setError(null);
       try {
-        const [statsResponse, volatilityResponse] = await Promise.all([
-          fetchStats(year),
-          fetchVolatilityStats(year)
-        ]);
+        // Estadísticas y volatilidad del año en una sola petición
+        const { data } = await fetchBootstrap("stats", { year });
 
-        if (!statsResponse?.data || !volatilityResponse?.data) {
+        if (!data?.stats || !data?.volatility) {
           throw new Error("No se pudieron obtener los datos estadísticos");
         }
 
-        setStats(statsResponse.data);
-        setVolatilityStats(volatilityResponse.data);
+        setStats(data.stats);
+        setVolatilityStats(data.volatility);
       } catch (err) {
         console.error("Error al cargar estadísticas:", err);
         setError(err.message || "Error al cargar las estadísticas");
@@ -168,4 +168,66 @@ export const fetchVolatilityStats = async (year) => {
         console.error("Error fetching volatility response:", error);
         return { data: [] };
     }
-}
\ No newline at end of file
+}
+export const fetchBootstrap = async (page, params = {}) => {
+    try {
+        const url = "http://127.0.0.1:5000/api/crypto/bootstrap"
+        const data = {
+            page: page,
+            ...params
+        }
+
+        const response = await fetch(url, {
+            method: 'POST',
+            headers: {
+                'Content-Type': 'application/json',
+            },
+            body: JSON.stringify(data),
+        });
+
+        const responseData = await response.json();
+
+        if (response.ok) {
+            return {data: responseData};
+        }
+        else {
+            throw new Error('Error fetching bootstrap data');
+        }
+    }
+    catch (error) {
+        console.error("Error fetching bootstrap data:", error);
+        return { data: null };
+    }
+}
+
+// Suscripción a los cambios del dataset (Server-Sent Events), para vistas cuyo rango llega hasta la última fecha.
+// options: since (última fecha que ya tiene la vista, YYYY-MM-DD) y opcionalmente startDate/endDate del rango;
+// handlers puede tener onPrices, onForecast, onNames y onVersion; devuelve una función para cerrar la conexión.
+// El servidor cierra cada conexión tras unos minutos y EventSource se reconecta desde la última fecha recibida
+export const subscribeToUpdates = (coins, options = {}, handlers = {}) => {
+    const params = new URLSearchParams({ coins: coins.join(",") });
+    if (options.since) {
+        params.append("since", options.since);
+    }
+    if (options.startDate) {
+        params.append("start_date", options.startDate);
+    }
+    if (options.endDate) {
+        params.append("end_date", options.endDate);
+    }
+
+    const source = new EventSource(`http://127.0.0.1:5000/api/crypto/stream?${params}`);
+    const listen = (event, handler) => {
+        if (handler) {
+            source.addEventListener(event, (e) => handler(JSON.parse(e.data)));
+        }
+    };
+
+    listen("prices", handlers.onPrices);
+    listen("forecast", handlers.onForecast);
+    listen("names", handlers.onNames);
+    listen("version", handlers.onVersion);
+    source.onerror = (error) => console.error("Error in updates stream:", error);
+
+    return () => source.close();
+}